@@ -0,0 +1,224 @@
+# scaling benchmarks for kmeans, pca, mds, neldermead and trendfilter, and the cold start time of importing each
+#
+# usage:
+#   python benchmark.py                      run the full sweep and print a table
+#   python benchmark.py --quick              only the smallest size of each sweep
+#   python benchmark.py --only kmeans pca    only the named benchmarks (prefixes of the case names)
+#   python benchmark.py --save base.json     also store the results as a baseline
+#   python benchmark.py --baseline base.json compare with a stored baseline, exiting with 1 on regressions
+#
+# wall time is the best of --repeat runs. peak memory is measured in a separate run under tracemalloc, so that
+# tracing doesn't inflate the timings (numpy reports its buffers to tracemalloc, cvxopt doesn't).
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+# where results are compared to by default, when the file exists
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+
+# synthetic data
+
+# n points in d dimensions, drawn around k well separated centers
+def make_blobs(n, d, k, seed):
+  rng = np.random.default_rng(seed)
+  centers = rng.normal(0, 10, (k, d))
+  return centers[rng.integers(0, k, n)] + rng.normal(0, 1, (n, d))
+
+# n points in d dimensions with most of the variance in a few directions
+def make_lowrank(n, d, rank, seed):
+  rng = np.random.default_rng(seed)
+  scales = 10.0 ** -np.arange(rank)
+  return (rng.normal(0, 1, (n, rank)) * scales) @ rng.normal(0, 1, (rank, d)) + rng.normal(0, 1e-3, (n, d))
+
+# a noisy piecewise linear series of length n
+def make_series(n, seed):
+  rng = np.random.default_rng(seed)
+  slopes = rng.normal(0, 1, 5)[np.minimum(np.arange(n) * 5 // n, 4)]
+  return (np.cumsum(slopes) + rng.normal(0, 2, n)).tolist()
+
+# an ill-conditioned quadratic in d dimensions, with its minimum at (1, ..., 1)
+def make_quadratic(d):
+  weights = np.linspace(1, 10, d)
+  def objective(params):
+    return float(weights @ (np.asarray(params) - 1) ** 2)
+  return objective
+
+# benchmark cases
+#
+# each case function takes the sweep parameters, builds its inputs, and returns a function that does the timed work
+# and returns a dict of counts and result quality metrics
+
+def case_kmeans(n, d, k, dtype='float64', seed=0):
+  from undef_analysis.kmeans import KMeans
+  data = make_blobs(n, d, k, seed).astype(dtype)
+  def run():
+    kmeans = KMeans(data, k=k, init='k-means++', seed=seed)
+    counters = kmeans.solve(limit_iterations=100)
+    return {'iterations': counters.iterations, 'energy': kmeans.get_energy()}
+  return run
+
+def case_pca(n, d, solver='auto', dtype='float64', seed=0):
+  from undef_analysis.pca import PCA
+  data = make_lowrank(n, d, 5, seed).astype(dtype)
+  def run():
+    pca = PCA(data, 3, solver=solver, seed=seed)
+    result = pca.get_result()
+    return {'variance': float(np.var(np.asarray(result), axis=0).sum())}
+  return run
+
+def case_mds_distances(n, d, seed=0):
+  from undef_analysis.mds import MDS
+  data = make_blobs(n, d, 4, seed)
+  def run():
+    distances = MDS.get_distances(data, condensed=True)
+    return {'sum': float(np.sum(distances))}
+  return run
+
+def case_mds_solve(n, method, seed=0):
+  from undef_analysis.mds import MDS
+  data = make_blobs(n, 5, 4, seed)
+  distances = MDS.get_distances(data)
+  def run():
+    random.seed(seed)
+    mds = MDS(distances, 2)
+    points = mds.solve(limit_iterations=300, limit_time=60, method=method, silent=True)
+    return {'stress': float(mds.get_stress(np.asarray(points)))}
+  return run
+
+def case_neldermead(d, engine='auto', seed=0):
+  from undef_analysis.neldermead import NelderMead, Point
+  objective = make_quadratic(d)
+  guess = np.random.default_rng(seed).normal(0, 1, d).tolist()
+  def run():
+    solver = NelderMead(objective, limit_iterations=200 * d, limit_time=60, silent=True, engine=engine)
+    best = solver.run(solver.get_simplex(d, guess, 1.0))
+    return {'evaluations': Point.get_num_evaluations(), 'value': best._value}
+  return run
+
+def case_trendfilter_cv(n, order, solver='pdip', seed=0):
+  from undef_analysis import trendfilter
+  values = make_series(n, seed)
+  def run():
+    curve, best, best_1se = trendfilter.cross_validated_trend_filter(values, order, solver=solver)
+    return {'path': len(curve), 'knots': len(best[2])}
+  return run
+
+# cold start of a fresh interpreter that imports one module, as a short-lived worker would; the metrics record which
+# heavy dependencies the import pulled in
+def case_import(module):
+  import subprocess
+  code = 'import sys, %s; print(int("numpy" in sys.modules), int("cvxopt" in sys.modules))'%(module)
+  def run():
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+    (numpy, cvxopt) = output.split()
+    return {'numpy': int(numpy), 'cvxopt': int(cvxopt)}
+  return run
+
+# (name, case function, list of parameter sets); the first parameter set of each sweep is the --quick one
+SWEEPS = [
+  ('import', case_import, [{'module': 'undef_analysis'}] + [{'module': 'undef_analysis.' + m} for m in ('telemetry', 'neldermead', 'kmeans', 'pca', 'mds', 'trendfilter')]),
+  ('kmeans', case_kmeans, [{'n': n, 'd': d, 'k': k} for n in (1000, 10000, 100000) for d in (2, 16) for k in (8, 64)] + [{'n': 100000, 'd': 16, 'k': 8, 'dtype': 'float32'}]),
+  ('pca', case_pca, [{'n': n, 'd': d} for n in (1000, 10000, 100000) for d in (10, 100)] + [{'n': 10000, 'd': 1000, 'solver': 'randomized'}, {'n': 100000, 'd': 100, 'dtype': 'float32'}]),
+  ('mds.get_distances', case_mds_distances, [{'n': n, 'd': 10} for n in (500, 2000, 5000)]),
+  ('mds.solve', case_mds_solve, [{'n': 10, 'method': 'neldermead'}] + [{'n': n, 'method': m} for n in (100, 500) for m in ('smacof', 'classical')]),
+  ('neldermead', case_neldermead, [{'d': d} for d in (2, 10, 50, 200)] + [{'d': 50, 'engine': 'points'}]),
+  ('trendfilter.cv', case_trendfilter_cv, [{'n': n, 'order': o} for n in (50, 200, 500) for o in (1, 2)] + [{'n': n, 'order': 1, 'solver': 'cvxopt'} for n in (50, 200)]),
+]
+
+# the key a result is stored and compared under
+def case_key(name, params):
+  return name + '(' + ', '.join('%s=%s'%(k, params[k]) for k in sorted(params)) + ')'
+
+# runs one case, returning its timing, peak memory and metrics
+def measure(func, params, repeat, memory):
+  run = func(**params)
+  times = []
+  for i in range(repeat):
+    start = time.perf_counter()
+    metrics = run()
+    times.append(time.perf_counter() - start)
+  result = {'time': min(times), 'metrics': metrics}
+  if memory:
+    tracemalloc.start()
+    try:
+      run()
+      result['memory'] = tracemalloc.get_traced_memory()[1]
+    finally:
+      tracemalloc.stop()
+  return result
+
+# returns a list of (key, problem) for results that regressed or changed compared to the baseline
+def compare(results, baseline, tolerance):
+  problems = []
+  for (key, result) in results.items():
+    if key not in baseline:
+      continue
+    base = baseline[key]
+    # tiny timings are mostly noise
+    if result['time'] > base['time'] * (1 + tolerance) and result['time'] - base['time'] > 0.01:
+      problems.append((key, 'time %.3fs -> %.3fs'%(base['time'], result['time'])))
+    if 'memory' in result and 'memory' in base and result['memory'] > base['memory'] * (1 + tolerance) and result['memory'] - base['memory'] > (1 << 20):
+      problems.append((key, 'memory %.1fMB -> %.1fMB'%(base['memory'] / 2 ** 20, result['memory'] / 2 ** 20)))
+    for (name, value) in result['metrics'].items():
+      old = base['metrics'].get(name)
+      if old is not None and not math.isclose(value, old, rel_tol=1e-3, abs_tol=1e-9):
+        problems.append((key, '%s changed %s -> %s'%(name, old, value)))
+  return problems
+
+def main(argv):
+  parser = argparse.ArgumentParser(description='scaling benchmarks')
+  parser.add_argument('--quick', action='store_true', help='only run the smallest size of each sweep')
+  parser.add_argument('--only', nargs='+', help='only run cases whose names start with one of these')
+  parser.add_argument('--repeat', type=int, default=3, help='timed runs per case, the best is kept')
+  parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run')
+  parser.add_argument('--baseline', default=None, help='baseline to compare with (default: %s, if present)'%(DEFAULT_BASELINE))
+  parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown or memory growth')
+  parser.add_argument('--save', default=None, help='write the results to this file')
+  args = parser.parse_args(argv)
+
+  results = {}
+  for (name, func, sweep) in SWEEPS:
+    if args.only is not None and not any(name.startswith(prefix) for prefix in args.only):
+      continue
+    for params in (sweep[:1] if args.quick else sweep):
+      key = case_key(name, params)
+      try:
+        result = measure(func, params, args.repeat, not args.no_memory)
+      except ImportError as ex:
+        print('%-60s skipped (%s)'%(key, ex))
+        continue
+      results[key] = result
+      memory = '%8.1fMB'%(result['memory'] / 2 ** 20) if 'memory' in result else ''
+      metrics = ' '.join('%s=%.6g'%(k, v) for (k, v) in sorted(result['metrics'].items()))
+      print('%-60s %9.4fs %s  %s'%(key, result['time'], memory, metrics))
+      sys.stdout.flush()
+
+  if args.save is not None:
+    with open(args.save, 'w') as f:
+      json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'results': results}, f, indent=2, sort_keys=True)
+
+  filename = args.baseline
+  if filename is None:
+    try:
+      open(DEFAULT_BASELINE).close()
+      filename = DEFAULT_BASELINE
+    except OSError:
+      return 0
+  with open(filename) as f:
+    baseline = json.load(f)['results']
+  problems = compare(results, baseline, args.tolerance)
+  for (key, problem) in problems:
+    print('REGRESSION %s: %s'%(key, problem))
+  if len(problems) == 0:
+    print('no regressions compared to %s'%(filename))
+  return 1 if len(problems) > 0 else 0
+
+if __name__ == '__main__':
+  sys.exit(main(sys.argv[1:]))
@@ -1,9 +1,5 @@
 import random
-from mds import MDS
-from pca import PCA
-from kmeans import KMeans
-import trendfilter
-import matplotlib.pyplot as plt
+from undef_analysis import MDS, PCA, KMeans, trendfilter
 
 # test data
 n = 10
@@ -61,6 +57,8 @@ for (i, o) in zip(input, pca_mds_output):
 
 # plot the results
 rainbow = [i for i in range(n)]
+# matplotlib is only needed for the plot
+import matplotlib.pyplot as plt
 plt.gca().set_autoscale_on(False)
 plt.axis([-8, 8, -5, 5])
 plt.scatter([p[0] for p in means], [p[1] for p in means], c=['#8080ff', '#ff8080'], s=500)
@@ -0,0 +1,50 @@
+'''
+a little collection of tools and utilities for data analysis
+
+submodules, and the names below, are imported on first use, so that importing the package (or one submodule) doesn't
+load numpy, cvxopt or multiprocessing for features that aren't used:
+  from undef_analysis import KMeans         # loads kmeans and numpy, but not cvxopt
+  from undef_analysis import trendfilter    # loads cvxopt
+'''
+
+import importlib
+
+# public name -> the submodule that defines it
+_NAMES = {
+  'KMeans': 'kmeans',
+  'StreamingKMeans': 'kmeans',
+  'PCA': 'pca',
+  'IncrementalPCA': 'pca',
+  'MDS': 'mds',
+  'NelderMead': 'neldermead',
+  'Point': 'neldermead',
+  'EvaluationCache': 'neldermead',
+  'Counters': 'telemetry',
+  'Event': 'telemetry',
+  'Telemetry': 'telemetry',
+  'printer': 'telemetry',
+  'trend_filter': 'trendfilter',
+  'trend_filter_many': 'trendfilter',
+  'trend_filter_path': 'trendfilter',
+  'find_lambda': 'trendfilter',
+  'cross_validated_trend_filter': 'trendfilter',
+  'TrendFilterCache': 'trendfilter',
+}
+
+_SUBMODULES = ['kmeans', 'mds', 'neldermead', 'pca', 'telemetry', 'trendfilter']
+
+__all__ = _SUBMODULES + list(_NAMES)
+
+def __getattr__(name):
+  ''' imports submodules and their names when they are first accessed '''
+  if name in _SUBMODULES:
+    return importlib.import_module('.' + name, __name__)
+  if name in _NAMES:
+    value = getattr(importlib.import_module('.' + _NAMES[name], __name__), name)
+    # cache it, so that __getattr__ isn't called again for this name
+    globals()[name] = value
+    return value
+  raise AttributeError('module %r has no attribute %r'%(__name__, name))
+
+def __dir__():
+  return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,13 @@
+import numpy as np
+
+# upper bound on the number of elements in a temporary block (of points, distances, or points x means x dimensions)
+BLOCK_ELEMENTS = 1 << 20
+
+def as_floats(data, dtype=None):
+  '''
+  returns data as a float array, without a copy when it already is one (read-only and memory-mapped arrays
+  included); without a dtype, float32 and float64 arrays are kept as they are and anything else becomes float64
+  '''
+  if dtype is None:
+    dtype = data.dtype if isinstance(data, np.ndarray) and data.dtype in (np.float32, np.float64) else np.float64
+  return np.asarray(data, dtype=dtype)
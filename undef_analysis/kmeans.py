@@ -0,0 +1,639 @@
+from datetime import datetime
+import random
+import numpy as np
+from ._arrays import BLOCK_ELEMENTS, as_floats
+from .telemetry import Telemetry
+
+def _distances2(points, means):
+  '''
+  returns the (len(points), len(means)) matrix of squared Euclidean distances, as |p|^2 - 2 p.m + |m|^2 through one
+  matrix product; it's computed in float64 relative to the centroid of the means, where it doesn't lose precision
+  '''
+  center = means.mean(axis=0, dtype=np.float64)
+  points, means = points - center, means - center
+  d2 = points @ means.T
+  d2 *= -2
+  d2 += np.einsum('ij,ij->i', points, points)[:, np.newaxis]
+  d2 += np.einsum('ij,ij->i', means, means)
+  return np.maximum(d2, 0, out=d2)
+
+def _exact_distances2(points, means):
+  ''' returns the same as _distances2, but from the differences of the coordinates, a block of points at a time '''
+  d2 = np.empty((len(points), len(means)))
+  size = max(1, BLOCK_ELEMENTS // max(1, len(means) * points.shape[1]))
+  for start in range(0, len(points), size):
+    diff = points[start:start + size, np.newaxis, :] - means[np.newaxis, :, :]
+    d2[start:start + size] = np.einsum('ijk,ijk->ij', diff, diff)
+  return d2
+
+def _blocks(n, k, d):
+  ''' yields slices over n rows such that each (rows x k) and (rows x d) temporary stays bounded '''
+  size = max(1, BLOCK_ELEMENTS // max(1, k, d))
+  for start in range(0, n, size):
+    yield slice(start, min(n, start + size))
+
+def _nearest(points, means):
+  ''' returns the index of the nearest mean for each row of points '''
+  labels = np.empty(len(points), dtype=np.intp)
+  for s in _blocks(len(points), len(means), points.shape[1]):
+    labels[s] = np.argmin(_distances2(points[s], means), axis=1)
+  return labels
+
+def _min_distances2(points, means):
+  ''' returns the squared distance from each row of points to the nearest mean '''
+  d2 = np.empty(len(points))
+  for s in _blocks(len(points), len(means), points.shape[1]):
+    d2[s] = _distances2(points[s], means).min(axis=1)
+  return d2
+
+def _nearest_two(points, means):
+  '''
+  returns the index of the nearest mean and the distances to the nearest and second nearest means
+  the two nearest are picked by _distances2 and then measured exactly, which also settles near-ties between them
+  '''
+  n = len(points)
+  labels = np.empty(n, dtype=np.intp)
+  first, second = np.empty(n), np.full(n, np.inf)
+  for s in _blocks(n, len(means), points.shape[1]):
+    d2 = _distances2(points[s], means)
+    rows = np.arange(len(d2))[:, np.newaxis]
+    best = np.argpartition(d2, 1, axis=1)[:, :2] if len(means) > 1 else np.zeros((len(d2), 1), dtype=np.intp)
+    diff = points[s][:, np.newaxis, :] - means[best]
+    exact = np.einsum('ijk,ijk->ij', diff, diff)
+    # ties go to the lower index, as with argmin over all the means
+    order = np.lexsort((best, exact), axis=1)
+    best, exact = best[rows, order], exact[rows, order]
+    labels[s], first[s] = best[:, 0], exact[:, 0]
+    if len(means) > 1:
+      # the second nearest is a lower bound, so it can't exceed the estimate of any mean not measured exactly
+      d2[rows, best] = np.inf
+      second[s] = np.minimum(exact[:, 1], d2.min(axis=1))
+  return labels, np.sqrt(first), np.sqrt(second)
+
+def _group_sums(points, labels, k):
+  ''' returns the per-cluster sums of points and the number of points in each cluster '''
+  sums = np.zeros((k, points.shape[1]))
+  if points.dtype == sums.dtype:
+    np.add.at(sums, labels, points)
+  else:
+    # np.add.at is far slower when it has to convert types, so other types are converted a block at a time
+    for s in _blocks(len(points), 1, points.shape[1]):
+      np.add.at(sums, labels[s], points[s].astype(sums.dtype))
+  return sums, np.bincount(labels, minlength=k)
+
+def _seed_plusplus(points, k, rng, weights=None):
+  '''
+  picks k of the (optionally weighted) points as initial means, each with probability proportional to its
+  squared distance from the means picked so far (k-means++)
+  '''
+  n = len(points)
+  weights = np.ones(n) if weights is None else weights
+  chosen = [int(np.searchsorted(np.cumsum(weights), rng.random() * weights.sum(), side='right'))]
+  diff = points - points[chosen[0]]
+  d2 = np.einsum('ij,ij->i', diff, diff)
+  for i in range(1, k):
+    cost = np.cumsum(weights * d2)
+    if cost[-1] > 0:
+      index = int(np.searchsorted(cost, rng.random() * cost[-1], side='right'))
+    else:
+      # every point coincides with a mean already, so any point is as good as another
+      index = int(rng.integers(n))
+    chosen.append(min(index, n - 1))
+    diff = points - points[chosen[-1]]
+    d2 = np.minimum(d2, np.einsum('ij,ij->i', diff, diff))
+  return points[chosen].copy()
+
+def _seed_parallel(points, k, rng, rounds=5, oversampling=None):
+  '''
+  picks k initial means with a few rounds of independent oversampling followed by a weighted k-means++
+  reduction of the candidates (k-means||), which takes far fewer passes over the data than k-means++
+  http://theory.stanford.edu/~sergei/papers/vldb12-kmpar.pdf
+  '''
+  n = len(points)
+  oversampling = 2 * k if oversampling is None else oversampling
+  candidates = points[[int(rng.integers(n))]]
+  d2 = _min_distances2(points, candidates)
+  for r in range(rounds):
+    cost = d2.sum()
+    if cost == 0:
+      break
+    picked = points[rng.random(n) < oversampling * d2 / cost]
+    if len(picked) == 0:
+      continue
+    candidates = np.concatenate((candidates, picked))
+    d2 = np.minimum(d2, _min_distances2(points, picked))
+  if len(candidates) <= k:
+    return np.concatenate((candidates, points[rng.choice(n, k - len(candidates), replace=False)]))
+  # weight each candidate by the number of points closest to it
+  weights = np.bincount(_nearest(points, candidates), minlength=len(candidates)).astype(float)
+  return _seed_plusplus(candidates, k, rng, weights)
+
+# the arrays shared with a worker process, attached once when the worker starts
+_shard_arrays = {}
+
+def _attach_shards(specs):
+  ''' worker initializer: maps the shared arrays into this process '''
+  from multiprocessing import shared_memory
+  for (key, (name, shape, dtype)) in specs.items():
+    shm = shared_memory.SharedMemory(name=name)
+    _shard_arrays[key] = (shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+
+def _shard_step(args):
+  ''' assigns the points in one shard, returning (changed, partial sums, counts, energy) '''
+  (start, stop, means) = args
+  data = _shard_arrays['data'][1][start:stop]
+  assigned = _shard_arrays['labels'][1][start:stop]
+  labels = _nearest(data, means)
+  changed = bool(np.any(labels != assigned))
+  assigned[:] = labels
+  sums, counts = _group_sums(data, labels, len(means))
+  energy = 0
+  for s in _blocks(len(data), 1, data.shape[1]):
+    diff = data[s] - means[labels[s]]
+    energy += float(np.einsum('ij,ij->', diff, diff, dtype=np.float64))
+  return changed, sums, counts, energy
+
+class _MeansIndex:
+  '''
+  an index over a fixed set of means, for classifying many points at once
+  low dimensional means go in a k-d tree (when scipy is available), otherwise blocks of points are compared
+  with all means through a single matrix product each
+  '''
+
+  # the k-d tree is only worth it with few dimensions and enough means
+  _TREE_DIMENSIONS = 8
+  _TREE_MEANS = 256
+
+  def __init__(self, means):
+    # scores are computed in float64 relative to the centroid of the means; in float32, or far from the origin, the
+    # expansion below loses most of its precision
+    self._center = means.mean(axis=0, dtype=np.float64)
+    self._means = means - self._center
+    self._norms = np.einsum('ij,ij->i', self._means, self._means)
+    self._tree = None
+    (k, d) = means.shape
+    if d <= _MeansIndex._TREE_DIMENSIONS and k >= _MeansIndex._TREE_MEANS:
+      try:
+        from scipy.spatial import cKDTree
+        self._tree = cKDTree(self._means)
+      except ImportError:
+        pass
+
+  def query(self, points):
+    ''' returns the index of the nearest mean for each row of points '''
+    if self._tree is not None:
+      return self._tree.query(points - self._center)[1].astype(np.intp)
+    labels = np.empty(len(points), dtype=np.intp)
+    size = max(1, BLOCK_ELEMENTS // max(self._means.shape))
+    for start in range(0, len(points), size):
+      block = points[start:start + size] - self._center
+      # |p - m|^2 = |p|^2 - 2 p.m + |m|^2, and |p|^2 doesn't change which mean is nearest
+      scores = block @ self._means.T
+      scores *= -2
+      scores += self._norms
+      labels[start:start + size] = np.argmin(scores, axis=1)
+    return labels
+
+def _restart(args):
+  ''' fits one randomly initialized KMeans to the shared data, returning (energy, means, labels) '''
+  (k, init, seed, options, limits) = args
+  kmeans = KMeans(_shard_arrays['data'][1], k=k, init=init, seed=seed, **options)
+  kmeans.solve(*limits)
+  return kmeans.get_energy(), kmeans._means, kmeans._labels
+
+class _SharedPool:
+  '''
+  a pool of worker processes that share some arrays with this process through shared memory, so that the
+  arrays are copied once instead of being pickled with every task
+  '''
+
+  def __init__(self, arrays, processes):
+    # multiprocessing is only imported by the features that use it, to keep imports fast
+    from multiprocessing import Pool, shared_memory
+    self._shared = {}
+    specs = {}
+    for (key, array) in arrays.items():
+      shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+      view = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+      view[:] = array
+      self._shared[key] = (shm, view)
+      specs[key] = (shm.name, array.shape, array.dtype.str)
+    self._pool = Pool(processes, initializer=_attach_shards, initargs=(specs,))
+
+  def map(self, func, tasks):
+    ''' runs func on every task in the worker processes, returning the results in order '''
+    return self._pool.map(func, tasks)
+
+  def get(self, key):
+    ''' returns a copy of a shared array '''
+    return self._shared[key][1].copy()
+
+  def close(self):
+    ''' stops the workers and releases the shared memory '''
+    self._pool.close()
+    self._pool.join()
+    shms = [shm for (shm, view) in self._shared.values()]
+    # the views must be released before the memory can be closed
+    self._shared = {}
+    for shm in shms:
+      shm.close()
+      shm.unlink()
+
+class KMeans:
+  '''
+  k-means clustering!
+  https://en.wikipedia.org/wiki/K-means_clustering
+  '''
+
+  @staticmethod
+  def get_distance2(p1, p2):
+    ''' returns squared Euclidean distance between two coordinates '''
+    return sum([(a - b) ** 2 for (a, b) in zip(p1, p2)])
+
+  # relative slack applied to bound comparisons so that rounding can never skip a needed distance (at least this
+  # much, and more for float32)
+  _BOUND_SLACK = 1e-9
+
+  @staticmethod
+  def best_of(data, k, restarts=10, init='k-means++', seed=None, processes=None, limit_iterations=None, limit_time=None, dist=None, accelerate=False, dtype=None):
+    '''
+    solves from several independent random initializations and returns the solved KMeans with the lowest energy
+    restarts: the number of independent solves
+    init, seed, dist, accelerate, dtype: see KMeans.__init__
+    processes: optional number of worker processes to run the solves concurrently (dist must then be picklable)
+    limit_iterations, limit_time: optional limits for each solve, see KMeans.solve
+    '''
+    seeds = np.random.SeedSequence(seed).spawn(restarts)
+    if processes is not None and processes > 1:
+      options = {'dist': dist, 'accelerate': accelerate, 'dtype': dtype}
+      tasks = [(k, init, s, options, (limit_iterations, limit_time)) for s in seeds]
+      pool = _SharedPool({'data': as_floats(data, dtype)}, processes)
+      try:
+        results = pool.map(_restart, tasks)
+      finally:
+        pool.close()
+      (energy, means, labels) = min(results, key=lambda r: r[0])
+      best = KMeans(data, means=means, dist=dist, accelerate=accelerate, dtype=dtype)
+      best._labels, best._energy = labels, energy
+      return best
+    best = None
+    for s in seeds:
+      kmeans = KMeans(data, k=k, init=init, seed=s, dist=dist, accelerate=accelerate, dtype=dtype)
+      kmeans.solve(limit_iterations, limit_time)
+      if best is None or kmeans.get_energy() < best.get_energy():
+        best = kmeans
+    return best
+
+  def __init__(self, data, means=None, k=None, dist=None, accelerate=False, init='first', seed=None, dtype=None):
+    '''
+    initializes the classifier
+    data: an (n, d) array or a list of coordinates; arrays (including read-only memory-mapped ones) are used
+      without being copied, and the means are then returned as an array too
+    means: optional list of means, defaults to k means picked according to init
+    k: optional number of means, defaults to the length of the list list means
+    dist: optional distance function to use, defaults to squared Euclidean distance
+    accelerate: optionally skip distance evaluations that the triangle inequality proves unnecessary
+      (Hamerly's algorithm), only available with the default distance function
+    init: how to pick the initial means when only k is given, one of 'first' (the first k points in the data
+      list, the default), 'k-means++', or 'k-means||' (similar to k-means++, in far fewer passes over large data)
+    seed: optional seed for the random initializations
+    dtype: optional type for the computation, e.g. numpy.float32 to halve memory and time; by default float32
+      data stays float32 and anything else is computed in float64
+    exactly one of means and k must be provided
+    '''
+    # the data is held as a single (n, d) array, with one cluster index per row
+    self._arrays = isinstance(data, np.ndarray)
+    self._data = as_floats(data, dtype)
+    self._labels = np.zeros(len(self._data), dtype=np.intp)
+    # a custom distance function forces the (slow) point-by-point path
+    self._dist = dist
+    if means is not None:
+      self._means = np.array(means, dtype=self._data.dtype)
+      self._k = len(means)
+    elif k is not None:
+      self._k = k
+      if init == 'first':
+        self._means = self._data[:k].copy()
+      elif init == 'k-means++':
+        self._means = _seed_plusplus(self._data, k, np.random.default_rng(seed))
+      elif init == 'k-means||':
+        self._means = _seed_parallel(self._data, k, np.random.default_rng(seed))
+      else:
+        raise Exception('unknown init [%s]'%(init))
+    else:
+      raise Exception('exactly one of means or k must be provided')
+    if accelerate and dist is not None:
+      raise Exception('accelerate requires the default distance function')
+    self._accelerate = accelerate
+    # per-point bounds on the distance to the assigned mean (upper) and to every other mean (lower),
+    # valid for the means as they were when the bounds were last computed
+    self._upper = self._lower = self._bound_means = None
+    # the energy of the current assignments, when known without another pass over the data
+    self._energy = None
+    # the index for classify_many, built on first use and discarded whenever the means change
+    self._index = None
+
+  def solve(self, limit_iterations=None, limit_time=None, processes=None, callback=None):
+    '''
+    runs until convergence, the optional iteration limit is reached, the optional time limit is reached, or the
+    optional callback asks to stop
+    processes: optional number of worker processes to spread each iteration over
+      (only available with the default distance function and without accelerate)
+    callback: optional function that receives a telemetry.Event (with the energy) after every iteration, and stops
+      the solve by returning a true value
+    returns the telemetry Counters of the solve (time in a custom distance function counts as objective time)
+    '''
+    telemetry = Telemetry('kmeans', callback)
+    dist = self._dist
+    if dist is not None:
+      self._dist = telemetry.timed(dist)
+    shards = None
+    step = self.iterate
+    if processes is not None and processes > 1:
+      if self._dist is not None or self._accelerate:
+        raise Exception('processes requires the default distance function and accelerate=False')
+      shards = _SharedPool({'data': self._data, 'labels': self._labels}, processes)
+      bounds = np.linspace(0, len(self._data), processes + 1).astype(int)
+      ranges = [(a, b) for (a, b) in zip(bounds[:-1], bounds[1:]) if a < b]
+      step = lambda: self._iterate_sharded(shards, ranges)
+    try:
+      updated = True
+      iteration = 0
+      if limit_time is not None:
+        start_time = datetime.now()
+        timer = 0
+      while updated and (limit_iterations is None or iteration < limit_iterations) and (limit_time is None or timer < limit_time):
+        updated = step()
+        iteration += 1
+        if limit_time is not None:
+          timer = (datetime.now() - start_time).total_seconds()
+        # the energy takes another pass over the data, so it's only found for a callback
+        energy = None
+        if callback is not None:
+          if shards is not None:
+            self._labels = shards.get('labels')
+          energy = self.get_energy()
+        if telemetry.step(energy, updated=updated):
+          break
+    finally:
+      if shards is not None:
+        self._labels = shards.get('labels')
+        shards.close()
+      self._dist = dist
+    return telemetry.finish()
+
+  def iterate(self):
+    ''' runs a single iteration '''
+    # first, assign each data point to the nearest cluster
+    labels = self._classify_data()
+    # remember if there was an update
+    updated = bool(np.any(labels != self._labels))
+    self._labels = labels
+    # if there cluster assignments have changed, then the means need to be recalculated
+    if updated:
+      self._update_means()
+    # return whether or not the clusters were updated
+    return updated
+
+  def _iterate_sharded(self, shards, ranges):
+    ''' runs a single iteration, with the assignment step for each range of points done by a worker process '''
+    results = shards.map(_shard_step, [(a, b, self._means) for (a, b) in ranges])
+    updated = any(r[0] for r in results)
+    sums = sum(r[1] for r in results)
+    counts = sum(r[2] for r in results)
+    energy = sum(r[3] for r in results)
+    if updated:
+      self._move_means(sums, counts)
+    else:
+      self._energy = energy
+    return updated
+
+  def _classify_data(self):
+    ''' returns the index of the nearest cluster for every data point '''
+    if self._accelerate:
+      return self._classify_data_bounded()
+    if self._dist is None:
+      return _nearest(self._data, self._means)
+    means = self._means.tolist()
+    return np.array([self._closest(means, d) for d in self._data.tolist()], dtype=np.intp)
+
+  def _classify_data_bounded(self):
+    '''
+    returns the same assignments as _classify_data, but only evaluates the distances from a point to all
+    means when its bounds can't rule out a change of cluster
+    '''
+    means = self._means
+    if self._upper is None:
+      labels, self._upper, self._lower = _nearest_two(self._data, means)
+      self._bound_means = means.copy()
+      return labels
+    labels = self._labels.copy()
+    upper, lower = self._upper, self._lower
+    # loosen the bounds by how far each mean has moved
+    drift = np.sqrt(np.einsum('ij,ij->i', means - self._bound_means, means - self._bound_means))
+    upper += drift[labels]
+    if len(drift) > 1:
+      top = np.argmax(drift)
+      second = np.max(np.delete(drift, top))
+      lower -= np.where(labels == top, second, drift[top])
+    self._bound_means = means.copy()
+    # a point can't be closer to another mean than half the distance from its own mean to the nearest other mean
+    separation = _exact_distances2(means, means)
+    np.fill_diagonal(separation, np.inf)
+    half = 0.5 * np.sqrt(separation.min(axis=1))
+    slack = max(KMeans._BOUND_SLACK, 100 * np.finfo(self._data.dtype).eps)
+    bound = np.maximum(half[labels], lower) * (1 - slack)
+    candidates = np.flatnonzero(upper * (1 + slack) >= bound)
+    if len(candidates) == 0:
+      return labels
+    # tighten the upper bound with the exact distance to the assigned mean
+    diff = self._data[candidates] - means[labels[candidates]]
+    upper[candidates] = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+    candidates = candidates[upper[candidates] * (1 + slack) >= bound[candidates]]
+    if len(candidates) == 0:
+      return labels
+    # only the remaining points need the distances to every mean
+    labels[candidates], upper[candidates], lower[candidates] = _nearest_two(self._data[candidates], means)
+    return labels
+
+  def _update_means(self):
+    ''' recalculates means with the current cluster assignments, in one pass over the data '''
+    self._move_means(*_group_sums(self._data, self._labels, self._k))
+
+  def _move_means(self, sums, counts):
+    ''' sets each mean to the average of its cluster, given per-cluster sums and counts '''
+    # empty clusters keep their previous mean
+    nonempty = counts > 0
+    self._means[nonempty] = sums[nonempty] * (1 / counts[nonempty])[:, np.newaxis]
+    self._energy = None
+    self._index = None
+
+  def _closest(self, means, point):
+    ''' returns the index of the mean closest to point under the custom distance function '''
+    cluster = 0
+    min = 0
+    for i in range(len(means)):
+      distance = self._dist(means[i], point)
+      if i == 0 or distance < min:
+        cluster = i
+        min = distance
+    return cluster
+
+  def classify(self, point):
+    ''' returns the index of the cluster to which the given point belongs '''
+    if self._dist is None:
+      diff = self._means - np.asarray(point, dtype=self._means.dtype)
+      return int(np.argmin(np.einsum('ij,ij->i', diff, diff)))
+    return self._closest(self._means.tolist(), point)
+
+  def classify_many(self, points):
+    '''
+    returns an array with the index of the cluster to which each of the given points belongs
+    points: an (n, d) array (or list) of coordinates
+    near-ties may be broken differently than by classify
+    '''
+    points = np.asarray(points, dtype=self._means.dtype)
+    if self._dist is not None:
+      means = self._means.tolist()
+      return np.array([self._closest(means, p) for p in points.tolist()], dtype=np.intp)
+    if self._index is None:
+      self._index = _MeansIndex(self._means)
+    return self._index.query(points)
+
+  def get_energy(self):
+    ''' returns the cumulative distance of all points to means '''
+    if self._energy is not None:
+      return self._energy
+    if self._dist is not None:
+      means = self._means.tolist()
+      return sum(self._dist(d, means[i]) for (d, i) in zip(self._data.tolist(), self._labels))
+    energy = 0
+    for s in _blocks(len(self._data), 1, self._data.shape[1]):
+      diff = self._data[s] - self._means[self._labels[s]]
+      energy += float(np.einsum('ij,ij->', diff, diff, dtype=np.float64))
+    return energy
+
+  def get_means(self):
+    ''' returns the coordinates of each of the means, as an array if the data was an array and otherwise a list '''
+    return self._means.copy() if self._arrays else self._means.tolist()
+
+  def get_labels(self):
+    ''' returns an array with the index of the cluster to which each data point belongs '''
+    return self._labels.copy()
+
+class StreamingKMeans:
+  '''
+  mini-batch k-means, for data that is too large to hold in memory
+  https://www.eecs.tufts.edu/~dsculley/papers/fastkmeans.pdf
+  '''
+
+  def __init__(self, means=None, k=None):
+    '''
+    initializes the classifier
+    means: optional list of means, defaults to the first k points seen
+    k: optional number of means, defaults to the length of the list means
+    exactly one of means and k must be provided
+    '''
+    if means is not None:
+      self._means = np.array(means, dtype=float)
+      self._k = len(means)
+    elif k is not None:
+      self._means = None
+      self._k = k
+      self._seed = []
+    else:
+      raise Exception('exactly one of means or k must be provided')
+    # the number of points that have been assigned to each mean so far
+    self._counts = np.zeros(self._k, dtype=np.int64)
+    # the index for classify_many, built on first use and discarded whenever the means change
+    self._index = None
+
+  def partial_fit(self, chunk):
+    ''' updates the means with a single mini-batch of points '''
+    chunk = np.asarray(chunk, dtype=float)
+    if self._means is None:
+      # the first k points seen become the initial means, each counting as one assigned point
+      needed = self._k - len(self._seed)
+      self._seed.extend(chunk[:needed])
+      chunk = chunk[needed:]
+      if len(self._seed) < self._k:
+        return
+      self._means = np.array(self._seed)
+      self._counts[:] = 1
+      self._seed = None
+    sums, counts = _group_sums(chunk, _nearest(chunk, self._means), self._k)
+    # each mean moves with a per-mean learning rate of 1 / (points assigned so far), so that it stays the
+    # running average of every point it has been assigned
+    self._counts += counts
+    nonempty = counts > 0
+    rate = 1 / self._counts[nonempty]
+    self._means[nonempty] += (sums[nonempty] - counts[nonempty, np.newaxis] * self._means[nonempty]) * rate[:, np.newaxis]
+    self._index = None
+
+  def fit(self, source, batch_size=1024, epochs=1):
+    '''
+    runs mini-batch updates over all of the data
+    source: either an array (which may be memory-mapped, see numpy.load(mmap_mode='r')) that is read in
+      slices of batch_size rows, or an iterable of chunks
+    epochs: the number of passes to make over source, which must be re-iterable if more than one
+    '''
+    for epoch in range(epochs):
+      if hasattr(source, 'shape'):
+        for start in range(0, len(source), batch_size):
+          self.partial_fit(source[start:start + batch_size])
+      else:
+        for chunk in source:
+          self.partial_fit(chunk)
+    return self
+
+  def classify(self, point):
+    ''' returns the index of the cluster to which the given point belongs '''
+    diff = self._means - np.asarray(point, dtype=float)
+    return int(np.argmin(np.einsum('ij,ij->i', diff, diff)))
+
+  def classify_many(self, points):
+    '''
+    returns an array with the index of the cluster to which each of the given points belongs
+    points: an (n, d) array (or list) of coordinates
+    near-ties may be broken differently than by classify
+    '''
+    if self._index is None:
+      self._index = _MeansIndex(self._means)
+    return self._index.query(np.asarray(points, dtype=float))
+
+  def get_means(self):
+    ''' returns a list coordinates of each of the means '''
+    return self._means.tolist()
+
+if __name__ == '__main__':
+  # example usage
+  n = 10
+  m = n // 2
+  offset = 1.25
+  data = []
+
+  # class A
+  for i in range(m):
+    data.append([random.gauss(-offset, 1)])
+
+  # class B
+  for i in range(n - m):
+    data.append([random.gauss(+offset, 1)])
+
+  # cluster the points
+  kmeans = KMeans(data, means=[[-offset], [+offset]])
+  kmeans.solve()
+
+  # show the results
+  print('Cluster Means:')
+  for mean in kmeans.get_means():
+    print(' %+.3f'%(mean[0]))
+  print('Classification:')
+  correct = 0
+  for (i, d) in enumerate(data):
+    cluster = kmeans.classify(d)
+    target = 0 if i < m else 1
+    if cluster == target:
+      correct += 1
+    print(' [%+.3f] -> %d'%(d[0], cluster))
+  print('Accuracy: %d/%d (%d%%)'%(correct, n, correct / n * 100))
@@ -0,0 +1,341 @@
+import random
+import numpy as np
+from ._arrays import BLOCK_ELEMENTS, as_floats
+from .neldermead import NelderMead
+from .telemetry import Telemetry
+
+def _pairwise(a, b, metric):
+  ''' returns the len(a) x len(b) matrix of distances between the rows of two arrays '''
+  if metric in ('euclidean', 'sqeuclidean'):
+    # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b cancels badly for points far from the origin, which float32 can't afford, so
+    # it's computed in float64 on points centered on the mean of a, a bounded block of b at a time
+    dtype = a.dtype
+    center = a.mean(axis=0, dtype=np.float64)
+    a = a - center
+    squares = np.empty((len(a), len(b)))
+    size = max(1, BLOCK_ELEMENTS // max(1, b.shape[1]))
+    for start in range(0, len(b), size):
+      block = b[start:start + size] - center
+      squares[:, start:start + size] = np.einsum('ij,ij->i', block, block) - 2 * (a @ block.T)
+    squares += np.einsum('ij,ij->i', a, a)[:, np.newaxis]
+    np.maximum(squares, 0, out=squares)
+    if metric == 'euclidean':
+      np.sqrt(squares, out=squares)
+    return squares.astype(dtype, copy=False)
+  if metric == 'cosine':
+    norms = np.linalg.norm(a, axis=1)[:, np.newaxis] * np.linalg.norm(b, axis=1)
+    return 1 - np.divide(a @ b.T, norms, out=np.zeros((len(a), len(b)), dtype=a.dtype), where=norms > 0)
+  diff = np.abs(a[:, np.newaxis, :] - b[np.newaxis, :, :])
+  if metric == 'cityblock':
+    return diff.sum(axis=2)
+  if metric == 'chebyshev':
+    return diff.max(axis=2)
+  raise Exception('unknown metric [%s]'%(metric))
+
+def _block_rows(width, dimensions, metric):
+  ''' returns how many rows can be compared with width others at a time, keeping temporaries bounded '''
+  per_row = max(width, dimensions) if metric in ('euclidean', 'sqeuclidean', 'cosine') else width * dimensions
+  return max(1, BLOCK_ELEMENTS // max(1, per_row))
+
+# the points and distance function shared with worker processes, set once when each worker starts
+_shared = {}
+
+def _share(data, dist):
+  ''' worker initializer for the custom distance function path '''
+  _shared['data'], _shared['dist'] = data, dist
+
+def _custom_rows(rows):
+  ''' returns arrays of the distances from each point in a range of rows to every later point, by the custom dist '''
+  data, dist = _shared['data'], _shared['dist']
+  n = len(data)
+  distances = lambda i: (dist(data[i], data[j]) for j in range(i + 1, n))
+  return [np.fromiter(distances(i), dtype=np.float64, count=n - i - 1) for i in range(*rows)]
+
+def _row_chunks(n, pairs):
+  ''' splits rows 0 to n into ranges covering at most pairs (row, later row) pairs each, and at least one row '''
+  chunks = []
+  start = 0
+  while start < n:
+    stop = start + 1
+    count = n - start - 1
+    while stop < n and count + n - stop - 1 <= pairs:
+      count += n - stop - 1
+      stop += 1
+    chunks.append((start, stop))
+    start = stop
+  return chunks
+
+class MDS:
+  '''
+  Multidimensional scaling!
+  https://en.wikipedia.org/wiki/Multidimensional_scaling
+  '''
+
+  # SMACOF stops once an iteration improves the stress by less than this fraction
+  _SMACOF_TOLERANCE = 1e-9
+
+  @staticmethod
+  def _embedded_distances(points):
+    ''' returns the N x N matrix of Euclidean distances between the rows of an N x ndim array '''
+    gram = points @ points.T
+    norms = np.diag(gram)
+    return np.sqrt(np.maximum(norms[:, np.newaxis] + norms[np.newaxis, :] - 2 * gram, 0))
+
+  @staticmethod
+  def _distance(a, b):
+    ''' returns the Euclidean distance between two vectors '''
+    return sum([(x - y) ** 2 for (x, y) in zip(a, b)]) ** 0.5
+    
+  @staticmethod
+  def get_distances(data, dist=None, metric='euclidean', condensed=False, filename=None, processes=None, dtype=None):
+    '''
+    returns a matrix of pairwise distances as a numpy array, computing each distance once
+    data: a list of N points (or an N x d array, which is used without being copied, even when memory-mapped)
+    dist: optional distance function, which overrides metric and is called once per pair
+    metric: the distance, computed in vectorized blocks, one of 'euclidean' (the default), 'sqeuclidean',
+      'cityblock', 'chebyshev', or 'cosine'
+    condensed: whether to return only the upper triangle, as a vector of the N * (N - 1) / 2 distances from
+      each point to every later point, instead of the square N x N matrix
+    filename: optional file to write the result to, as a memory-mapped array, for matrices larger than memory
+    processes: optional number of worker processes to call dist from (dist must then be picklable)
+    dtype: optional type of the computation and the result, e.g. numpy.float32 to halve memory; by default float32
+      data stays float32 and anything else (including the results of dist) is float64
+    '''
+    n = len(data)
+    if dist is None:
+      data = as_floats(data, dtype)
+      dtype = data.dtype
+    elif dtype is None:
+      dtype = np.float64
+    shape = (n * (n - 1) // 2,) if condensed else (n, n)
+    if filename is not None:
+      result = np.lib.format.open_memmap(filename, mode='w+', dtype=dtype, shape=shape)
+    else:
+      result = np.empty(shape, dtype=dtype)
+    # the offset of each row's segment in the condensed form
+    offsets = [i * n - i * (i + 1) // 2 for i in range(n + 1)]
+
+    def store_rows(start, rows):
+      ''' stores the distances from rows start, start + 1, ... to all later points '''
+      for (i, row) in enumerate(rows, start):
+        if condensed:
+          result[offsets[i]:offsets[i + 1]] = row
+        else:
+          result[i, i] = 0
+          result[i, i + 1:] = row
+          result[i + 1:, i] = row
+
+    if dist is not None:
+      # chunks are split by their number of pairs, since rows near the top hold more of them; that bounds the memory
+      # of each chunk's distances, and gives every process several chunks to balance the work
+      pairs = n * (n - 1) // 2
+      chunks = _row_chunks(n, max(1, min(BLOCK_ELEMENTS, pairs // (4 * (processes or 1)))))
+      if processes is not None and processes > 1:
+        from multiprocessing import Pool
+        with Pool(processes, initializer=_share, initargs=(data, dist)) as pool:
+          for (chunk, rows) in zip(chunks, pool.imap(_custom_rows, chunks)):
+            store_rows(chunk[0], rows)
+      else:
+        _share(data, dist)
+        for chunk in chunks:
+          store_rows(chunk[0], _custom_rows(chunk))
+        _shared.clear()
+      return result
+    start = 0
+    while start < n:
+      # each block of rows is only compared with itself and the points after it
+      stop = min(n, start + _block_rows(n - start, data.shape[1], metric))
+      block = _pairwise(data[start:stop], data[start:], metric)
+      if condensed:
+        store_rows(start, [block[i, i + 1:] for i in range(stop - start)])
+      else:
+        # mirroring the upper triangle makes the result exactly symmetric, with a zero diagonal
+        upper = np.triu(block[:, :stop - start], 1)
+        result[start:stop, start:stop] = upper + upper.T
+        result[start:stop, stop:] = block[:, stop - start:]
+        result[stop:, start:stop] = block[:, stop - start:].T
+      start = stop
+    return result
+
+  @staticmethod
+  def _cross_distances(data, landmarks, dist=None):
+    ''' returns the len(data) x len(landmarks) matrix of distances, using an optional distance function '''
+    if dist is not None:
+      return np.array([[dist(a, b) for b in landmarks] for a in data])
+    data = as_floats(data)
+    landmarks = np.asarray(landmarks, dtype=data.dtype)
+    result = np.empty((len(data), len(landmarks)), dtype=data.dtype)
+    size = max(1, BLOCK_ELEMENTS // max(1, len(landmarks), data.shape[1]))
+    for start in range(0, len(data), size):
+      result[start:start + size] = _pairwise(data[start:start + size], landmarks, 'euclidean')
+    return result
+
+  @staticmethod
+  def landmark(data, ndim=2, landmarks=100, dist=None, seed=None):
+    '''
+    landmark MDS: embeds a random subset of the points with classical MDS, then places every point by
+    triangulation from its distances to those landmarks, so the N x N distance matrix is never built
+    https://graphics.stanford.edu/courses/cs468-05-winter/Papers/Landmarks/Silva_landmarks5.pdf
+    data: a list of N points (or an N x d array)
+    landmarks: the number of landmarks, default 100
+    dist: optional distance function (defaults to Euclidean distance)
+    seed: optional seed for picking the landmarks
+    returns the MDS of the landmarks (whose embed_new places further points) and the N embedded points, as an
+      array if data is an array and otherwise a list
+    '''
+    index = sorted(random.Random(seed).sample(range(len(data)), min(landmarks, len(data))))
+    chosen = data[index] if isinstance(data, np.ndarray) else [data[i] for i in index]
+    mds = MDS(MDS.get_distances(chosen, dist), ndim)
+    mds.solve(method='classical')
+    points = mds.embed_new(MDS._cross_distances(data, chosen, dist))
+    return mds, points if isinstance(data, np.ndarray) else points.tolist()
+
+  def __init__(self, distances, ndim=2, dtype=None):
+    '''
+    distances: an N x N matrix of pairwise distances; an array (even a memory-mapped one) is used without being
+      copied, and the embeddings are then arrays too
+    ndim: number of output dimensions, default 2
+    dtype: optional type for the computation, e.g. numpy.float32; by default float32 distances stay float32 and
+      anything else is computed in float64
+    '''
+    self.distances = distances
+    self._distances = as_floats(distances, dtype)
+    self._arrays = isinstance(distances, np.ndarray)
+    self.ndim = ndim
+    self.npoints = len(distances)
+    # what embed_new needs, once an embedding is found with the classical method
+    self._triangulation = self._mean_squares = None
+    # the telemetry counters of the latest solve
+    self._counters = None
+
+  @staticmethod
+  def _stress(embedded, distances):
+    ''' returns the sum of squared differences between two distance matrices, off the diagonal '''
+    diff = embedded - distances
+    np.fill_diagonal(diff, 0)
+    return float(np.einsum('ij,ij->', diff, diff))
+
+  def get_stress(self, points):
+    '''
+    returns the sum of squared differences between the embedded and true distances, over all ordered pairs
+    points: a list of self.npoints points (or an npoints x ndim array)
+    '''
+    return MDS._stress(MDS._embedded_distances(np.asarray(points, dtype=self._distances.dtype)), self._distances)
+
+  def solve(self, limit_iterations=1000, limit_time=5, guess=None, method='neldermead', callback=None, silent=False):
+    '''
+    optimizes an embedding in self.ndim dimensions
+    limit: maximum number of iterations, default 1000
+    guess: a list of self.npoints points as an initial guess, optional
+    method: one of 'neldermead' (the Nelder-Mead algorithm over all coordinates, the default), 'smacof'
+      (stress majorization, which is much faster for more than a handful of points), or 'classical' (Torgerson's
+      eigendecomposition, which is exact for Euclidean distances and ignores the limits and guess)
+    callback: optional function that receives a telemetry.Event (with the stress) after every iteration, and stops
+      the solve by returning a true value; the counters are available from get_counters afterwards
+    silent: whether to suppress the progress that the 'neldermead' method prints
+    returns the best-fit points, as an npoints x ndim array if the distances are an array and otherwise a list
+    '''
+    if method == 'classical':
+      telemetry = Telemetry('classical', callback)
+      points = self._classical()
+      telemetry.step(self.get_stress(points))
+      self._counters = telemetry.finish()
+      return self._output(points)
+    if guess is None:
+      initial = [random.gauss(0, 1) for i in range(self.npoints * self.ndim)]
+    else:
+      initial = []
+      for i in range(self.npoints):
+        for j in range(self.ndim):
+          initial.append(guess[i][j])
+    if method == 'smacof':
+      telemetry = Telemetry('smacof', callback)
+      initial = np.reshape(np.asarray(initial, dtype=self._distances.dtype), (self.npoints, self.ndim))
+      final = self._smacof(initial, limit_iterations, limit_time, telemetry)
+      self._counters = telemetry.finish()
+      return self._output(final)
+    elif method != 'neldermead':
+      raise Exception('unknown method [%s]'%(method))
+    def objective(params):
+      return self.get_stress(np.reshape(params, (self.npoints, self.ndim)))
+    solver = NelderMead(objective, limit_iterations=limit_iterations, limit_time=limit_time, silent=silent, callback=callback)
+    simplex = solver.get_simplex(len(initial), tuple(initial), 0.1)
+    best = solver.run(simplex)
+    self._counters = solver.get_counters()
+    final = best._location
+    if self._arrays:
+      return np.reshape(np.asarray(final, dtype=self._distances.dtype), (self.npoints, self.ndim))
+    return [final[i * self.ndim : (i + 1) * self.ndim] for i in range(self.npoints)]
+
+  def _output(self, points):
+    ''' returns an array of points as it is, or as a list when the distances were given as a list '''
+    return points if self._arrays else points.tolist()
+
+  def _classical(self):
+    '''
+    embeds the points with the leading eigenvectors of the double-centered squared distance matrix, and
+    remembers what embed_new needs to place new points the same way
+    '''
+    squares = self._distances ** 2
+    self._mean_squares = squares.mean(axis=0)
+    # double centering: -1/2 * J * D^2 * J, with J = I - 11'/N
+    b = squares - self._mean_squares[np.newaxis, :] - squares.mean(axis=1)[:, np.newaxis] + squares.mean()
+    b *= -0.5
+    vals, vecs = np.linalg.eigh(b)
+    order = np.argsort(-vals)[:self.ndim]
+    # non-Euclidean distances can give negative eigenvalues, which carry no embedding
+    vals, vecs = np.maximum(vals[order], 0), vecs[:, order]
+    scale = np.sqrt(vals)
+    self._triangulation = (vecs * np.divide(1, scale, out=np.zeros_like(scale), where=scale > 0)).T
+    return vecs * scale
+
+  def embed_new(self, distances):
+    '''
+    places new points into an embedding found by the classical method (or landmark), by triangulation
+    distances: the distances from a new point to each of the self.npoints points, or a list of these (or an
+      array of either)
+    returns the embedded point, or a list of embedded points (as an array when distances is an array)
+    '''
+    if self._triangulation is None:
+      raise Exception('embed_new requires an embedding found with the classical method')
+    squares = as_floats(distances, self._distances.dtype) ** 2
+    points = -0.5 * (squares - self._mean_squares) @ self._triangulation.T
+    return points if isinstance(distances, np.ndarray) else points.tolist()
+
+  def get_counters(self):
+    ''' returns the telemetry Counters of the latest solve '''
+    return self._counters
+
+  def _smacof(self, points, limit_iterations, limit_time, telemetry):
+    '''
+    improves the embedding by repeated Guttman transforms, each of which can only decrease the stress
+    https://en.wikipedia.org/wiki/Stress_majorization
+    '''
+    distances = self._distances
+    embedded = MDS._embedded_distances(points)
+    stress = MDS._stress(embedded, distances)
+    iteration = 0
+    while limit_iterations is None or iteration < limit_iterations:
+      iteration += 1
+      ratio = np.divide(distances, embedded, out=np.zeros_like(embedded), where=embedded > 0)
+      np.fill_diagonal(ratio, 0)
+      b = -ratio
+      b[np.diag_indices_from(b)] = ratio.sum(axis=1)
+      points = b @ points / self.npoints
+      embedded = MDS._embedded_distances(points)
+      previous, stress = stress, MDS._stress(embedded, distances)
+      if telemetry.step(stress):
+        break
+      if previous - stress <= MDS._SMACOF_TOLERANCE * previous:
+        break
+      if limit_time is not None and telemetry.counters.elapsed >= limit_time:
+        break
+    return points
+
+if __name__ == '__main__':
+  # example usage
+  input = [[i + random.gauss(0, 1), i + random.gauss(0, 1)] for i in range(5)]
+  mds = MDS(MDS.get_distances(input), 1)
+  output = mds.solve()
+  for (i, o) in zip(input, output):
+    print('(%+.3f, %+.3f) -> (%+.3f)'%(i[0], i[1], o[0]))
@@ -0,0 +1,474 @@
+import bisect
+import collections
+import os
+import threading
+import time
+from .telemetry import Telemetry
+
+# remembers the counters of the most recent run in each thread, for Point.get_num_evaluations
+_local = threading.local()
+
+class Point:
+  '''
+  utility class for storing a location and the value of the objective function at that location
+  location is an (n+1)-dimensional point that is part of a simplex in n-dimensional space
+  '''
+
+  def __init__(self, location):
+    ''' creates a new point at the specified coordinates '''
+    self._location = location
+    self._value = None
+
+  def __str__(self):
+    return "Point" + str(self._location) + "=" + str(self._value)
+
+  def __repr__(self):
+    return str(self)
+
+  def _set_value(self, objective):
+    ''' assigns a value to this point by calling the objective function '''
+    self._value = objective(self._location)
+
+  def get_center(points):
+    ''' finds the center of mass of a set of points '''
+    center = [0 for i in range(len(points))]
+    for point in points:
+      for i in range(len(point._location)):
+        center[i] += point._location[i]
+    for i in range(len(points[0]._location)):
+      center[i] /= len(points)
+    return center
+
+  def new_point(point, center, scale, objective=None):
+    ''' creates a new point by moving one point in relation to another point, evaluated unless objective is None '''
+    location = [(center[i] + (scale * (center[i] - point._location[i]))) for i in range(len(point._location))]
+    point = Point(tuple(location))
+    if objective is not None:
+      point._set_value(objective)
+    return point
+
+  def get_num_evaluations():
+    ''' returns the number of times the objective function was called by the latest run in this thread '''
+    counters = getattr(_local, 'counters', None)
+    return counters.evaluations if counters is not None else 0
+
+  def get_num_cache_hits():
+    ''' returns the number of values the latest run in this thread took from its cache '''
+    counters = getattr(_local, 'counters', None)
+    return counters.hits if counters is not None else 0
+
+class EvaluationCache:
+  '''
+  a bounded, least recently used store of objective values by location, shared by any number of runs
+  locations can be rounded to some number of digits first, so that nearly identical locations share a value
+  given a filename, stored values are loaded from it when the cache is created and written back by save
+  '''
+
+  def __init__(self, size=4096, digits=None, filename=None):
+    if size < 1:
+      raise Exception('cache size must be positive [%s]'%(size))
+    self._size = size
+    self._digits = digits
+    self._filename = filename
+    self._values = collections.OrderedDict()
+    self._lock = threading.Lock()
+    self._save_lock = threading.Lock()
+    self.hits = self.misses = 0
+    if filename is not None and os.path.exists(filename):
+      # pickle is only imported when there's a cache file, to keep imports fast
+      import pickle
+      with open(filename, 'rb') as f:
+        for (key, value) in pickle.load(f):
+          self._values[key] = value
+      while len(self._values) > size:
+        self._values.popitem(last=False)
+
+  def _key(self, location):
+    if self._digits is None:
+      return tuple(location)
+    return tuple(round(x, self._digits) for x in location)
+
+  def get(self, location):
+    ''' returns (True, value) for a known location, otherwise (False, None) '''
+    key = self._key(location)
+    with self._lock:
+      if key in self._values:
+        self.hits += 1
+        self._values.move_to_end(key)
+        return (True, self._values[key])
+      self.misses += 1
+      return (False, None)
+
+  def put(self, location, value):
+    ''' stores the value at a location, dropping the least recently used value when full '''
+    key = self._key(location)
+    with self._lock:
+      self._values[key] = value
+      self._values.move_to_end(key)
+      if len(self._values) > self._size:
+        self._values.popitem(last=False)
+
+  def save(self):
+    '''
+    writes the stored values to the cache file, if there is one
+    saves are serialized, and each writes its own temporary file, so that concurrent runs (or processes) sharing a file
+    never replace it with a partial or missing file
+    '''
+    if self._filename is None:
+      return
+    import pickle
+    import tempfile
+    with self._save_lock:
+      with self._lock:
+        items = list(self._values.items())
+      (handle, temp) = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self._filename)), suffix='.tmp')
+      try:
+        with os.fdopen(handle, 'wb') as f:
+          pickle.dump(items, f)
+        os.replace(temp, self._filename)
+      except BaseException:
+        os.remove(temp)
+        raise
+
+  def __len__(self):
+    return len(self._values)
+
+class _PointSimplex:
+  ''' a simplex stored as a list of points, sorted in full at every step '''
+
+  def __init__(self, points):
+    self._points = points
+
+  def step(self, nm, telemetry):
+    ''' replaces the worst point (or shrinks the simplex) and returns the value of the last point placed '''
+    simplex = self._points
+    list.sort(simplex, key = lambda point: point._value)
+    best = simplex[0]
+    worse = simplex[-2]
+    worst = simplex[-1]
+    center = Point.get_center(simplex[:-1])
+    pointR = Point.new_point(worst, center, nm._alpha)
+    if nm._speculative:
+      pointE = Point.new_point(worst, center, nm._gamma)
+      pointC = Point.new_point(worst, center, nm._rho)
+      nm._evaluate([pointR, pointE, pointC], telemetry)
+    else:
+      nm._evaluate([pointR], telemetry)
+    if best._value <= pointR._value < worse._value:
+      simplex[-1] = pointR
+    elif pointR._value < best._value:
+      if not nm._speculative:
+        pointE = Point.new_point(worst, center, nm._gamma)
+        nm._evaluate([pointE], telemetry)
+      if pointE._value < pointR._value:
+        simplex[-1] = pointE
+      else:
+        simplex[-1] = pointR
+    else:
+      if not nm._speculative:
+        pointC = Point.new_point(worst, center, nm._rho)
+        nm._evaluate([pointC], telemetry)
+      if pointC._value < worst._value:
+        simplex[-1] = pointC
+      else:
+        # the shrunken points are independent of each other
+        simplex[1:] = [Point.new_point(point, best._location, nm._sigma) for point in simplex[1:]]
+        nm._evaluate(simplex[1:], telemetry)
+    return simplex[-1]._value
+
+  def finish(self):
+    ''' sorts the simplex and returns the best point '''
+    list.sort(self._points, key = lambda point: point._value)
+    return self._points[0]
+
+class _ArraySimplex:
+  '''
+  a simplex stored as the rows of an (n+1, n) array, for high dimensional problems
+  the sum of the vertices is kept up to date as vertices are replaced, and the vertex order is kept by insertion, so
+  a step costs O(n) outside of the objective function instead of O(n^2)
+  '''
+
+  def __init__(self, points):
+    import numpy as np
+    self._points = points
+    self._vertices = np.array([point._location for point in points], dtype=float)
+    # row indices from best to worst, and their values in the same order
+    self._order = sorted(range(len(points)), key = lambda i: points[i]._value)
+    self._values = [points[i]._value for i in self._order]
+    self._refresh()
+
+  def _refresh(self):
+    ''' recomputes the sum of the vertices, which otherwise slowly accumulates rounding error '''
+    self._total = self._vertices.sum(axis=0)
+    self._updates = 0
+
+  def _point(self, location):
+    return Point(tuple(location.tolist()))
+
+  def _replace_worst(self, location, value):
+    ''' overwrites the worst vertex and moves it to its place in the order '''
+    row = self._order.pop()
+    self._values.pop()
+    self._total += location - self._vertices[row]
+    self._vertices[row] = location
+    self._updates += 1
+    if self._updates >= self._vertices.shape[1]:
+      self._refresh()
+    # ties go after the existing vertices, like the stable sort of the list based simplex
+    index = bisect.bisect_right(self._values, value)
+    self._order.insert(index, row)
+    self._values.insert(index, value)
+
+  def step(self, nm, telemetry):
+    ''' replaces the worst vertex (or shrinks the simplex) and returns the value of the last vertex placed '''
+    vertices = self._vertices
+    n = vertices.shape[1]
+    best = vertices[self._order[0]]
+    worst = vertices[self._order[-1]]
+    center = (self._total - worst) / n
+    direction = center - worst
+    locationR = center + nm._alpha * direction
+    pointR = self._point(locationR)
+    if nm._speculative:
+      locationE = center + nm._gamma * direction
+      locationC = center + nm._rho * direction
+      pointE = self._point(locationE)
+      pointC = self._point(locationC)
+      nm._evaluate([pointR, pointE, pointC], telemetry)
+    else:
+      nm._evaluate([pointR], telemetry)
+    if self._values[0] <= pointR._value < self._values[-2]:
+      self._replace_worst(locationR, pointR._value)
+      return pointR._value
+    elif pointR._value < self._values[0]:
+      if not nm._speculative:
+        locationE = center + nm._gamma * direction
+        pointE = self._point(locationE)
+        nm._evaluate([pointE], telemetry)
+      if pointE._value < pointR._value:
+        self._replace_worst(locationE, pointE._value)
+        return pointE._value
+      self._replace_worst(locationR, pointR._value)
+      return pointR._value
+    if not nm._speculative:
+      locationC = center + nm._rho * direction
+      pointC = self._point(locationC)
+      nm._evaluate([pointC], telemetry)
+    if pointC._value < self._values[-1]:
+      self._replace_worst(locationC, pointC._value)
+      return pointC._value
+    # shrink every vertex towards the best one
+    rows = self._order[1:]
+    vertices[rows] = best + nm._sigma * (best - vertices[rows])
+    points = [self._point(vertices[row]) for row in rows]
+    nm._evaluate(points, telemetry)
+    values = [self._values[0]] + [point._value for point in points]
+    ranks = sorted(range(len(values)), key = lambda i: values[i])
+    self._order = [self._order[i] for i in ranks]
+    self._values = [values[i] for i in ranks]
+    self._refresh()
+    return points[-1]._value
+
+  def finish(self):
+    ''' writes the vertices back into the original list of points, sorted, and returns the best point '''
+    self._points[:] = [self._point(self._vertices[row]) for row in self._order]
+    for (point, value) in zip(self._points, self._values):
+      point._value = value
+    return self._points[0]
+
+class NelderMead:
+  '''
+  Derivative-free optimization! (via the Nelder-Mead algorithm)
+  https://en.wikipedia.org/wiki/Nelder%E2%80%93Mead_method
+  '''
+
+  @staticmethod
+  def optimize(objective, guess, radius=1.0, limit_iterations=100, limit_value=1e-3, limit_time=1, alpha=1.0, gamma=2.0, rho=-0.5, sigma=0.5, silent=False, executor=None, objective_batch=None, speculative=False, engine='auto', cache=None, callback=None):
+    ''' convenience method for one-line optimization  '''
+    nm = NelderMead(objective, limit_iterations, limit_value, limit_time, alpha, gamma, rho, sigma, silent, executor, objective_batch, speculative, engine, cache, callback)
+    if type(guess) == int:
+      guess = [0] * guess
+    return nm.run(nm.get_simplex(len(guess), guess, radius))
+
+  @staticmethod
+  def multi_start(objective, guesses, radius=1.0, executor=None, **options):
+    '''
+    optimizes from each of several guesses and returns the best point found
+    the optimizations run concurrently on the given concurrent.futures executor, or one after another without one
+    any other options are passed along to NelderMead.optimize
+    '''
+    if len(guesses) == 0:
+      raise Exception('at least one guess must be given')
+    if executor is None:
+      results = [NelderMead.optimize(objective, guess, radius, **options) for guess in guesses]
+    else:
+      futures = [executor.submit(NelderMead.optimize, objective, guess, radius, **options) for guess in guesses]
+      results = [future.result() for future in futures]
+    return min(results, key=lambda point: point._value)
+
+  # problems with at least this many dimensions use the array based simplex by default
+  _ARRAY_DIMENSIONS = 16
+
+  def __init__(self, objective, limit_iterations=None, limit_value=None, limit_time=None, alpha=1.0, gamma=2.0, rho=-0.5, sigma=0.5, silent=False, executor=None, objective_batch=None, speculative=False, engine='auto', cache=None, callback=None):
+    if limit_iterations is None and limit_value is None and limit_time is None:
+      raise Exception('at least one of (limit_iterations, limit_value, limit_time) must be given')
+    if engine not in ('auto', 'points', 'array'):
+      raise Exception('unknown engine [%s]'%(engine))
+    # the objective function - takes a single tuple as an argument
+    self._objective = objective
+    # the maximum number of times to evaluate the objective function
+    self._limit = limit_iterations
+    # the target value - iteration will stop once this value has been found
+    self._target = limit_value
+    # the maximum time to spend solving
+    self._timer = limit_time
+    # the reflection coefficient (default 1)
+    self._alpha = alpha
+    # the expansion coefficient (default 2)
+    self._gamma = gamma
+    # the contraction coefficient (default -1/2)
+    self._rho = rho
+    # the reduction coefficient (default 1/2)
+    self._sigma = sigma
+    # whether to suppress progress reports
+    self._silent = silent
+    # an optional concurrent.futures executor, for evaluating independent points concurrently (the objective
+    # must be picklable for a process pool)
+    self._executor = executor
+    # an optional function that evaluates a list of locations at once, returning a list of values
+    self._objective_batch = objective_batch
+    # whether to evaluate the expansion and contraction points together with every reflection point, which
+    # spends more evaluations in exchange for fewer rounds of (concurrent) evaluation
+    self._speculative = speculative
+    # how the simplex is stored while running: a list of points ('points'), an array ('array', needs numpy), or
+    # chosen by the number of dimensions ('auto')
+    self._engine = engine
+    # an optional EvaluationCache, which saves calling the objective function again at known locations (values
+    # from the cache don't count towards limit_iterations)
+    self._cache = cache
+    # an optional function that receives a telemetry.Event after every iteration, and stops the run by returning a
+    # true value (progress is also printed unless silent)
+    self._callback = callback
+    self._counters = None
+
+  def _get_engine(self, simplex):
+    ''' wraps the simplex in the configured engine '''
+    engine = self._engine
+    if engine == 'auto':
+      engine = 'points'
+      # the array engine needs numpy, which is only looked for here, and imported once the engine is created
+      import importlib.util
+      if len(simplex) - 1 >= NelderMead._ARRAY_DIMENSIONS and importlib.util.find_spec('numpy') is not None:
+        engine = 'array'
+    if engine == 'array':
+      return _ArraySimplex(simplex)
+    return _PointSimplex(simplex)
+
+  def _evaluate(self, points, telemetry=None):
+    ''' assigns values to several independent points, concurrently or in one batch when possible '''
+    if self._cache is not None:
+      pending = []
+      for point in points:
+        (found, value) = self._cache.get(point._location)
+        if found:
+          point._value = value
+        else:
+          pending.append(point)
+      if telemetry is not None:
+        telemetry.counters.hits += len(points) - len(pending)
+      points = pending
+      if len(points) == 0:
+        return
+    start = time.perf_counter()
+    if self._objective_batch is None and self._executor is None:
+      for point in points:
+        point._set_value(self._objective)
+    else:
+      locations = [point._location for point in points]
+      if self._objective_batch is not None:
+        values = self._objective_batch(locations)
+      else:
+        values = self._executor.map(self._objective, locations)
+      for (point, value) in zip(points, values):
+        point._value = value
+    # concurrent evaluations count their wall time
+    seconds = time.perf_counter() - start
+    if self._cache is not None:
+      for point in points:
+        self._cache.put(point._location, point._value)
+    if telemetry is not None:
+      telemetry.record(seconds, len(points))
+
+  def get_simplex(self, numDimensions, centroid=(), radius=1.0):
+    ''' creates a simplex around some point using the specified radius '''
+    if len(centroid) == 0:
+      centroid = tuple([0 for i in range(numDimensions)])
+    points = []
+    for i in range(numDimensions + 1):
+      if i < numDimensions:
+        coords = [(centroid[j] + (radius if i == j else 0)) for j in range(numDimensions)]
+      else:
+        coords = [centroid[j] + ((numDimensions ** -.5) * -radius) for j in range(numDimensions)]
+      points.append(Point(tuple(coords)))
+    self._evaluate(points)
+    return points
+
+  def _printing(self, callback):
+    ''' wraps a callback so that progress is also printed, at most once per second '''
+    li = self._limit if self._limit is not None else 0
+    lv = self._target if self._target is not None else 0
+    lt = self._timer if self._timer is not None else 0
+    last = [0]
+    def report(event):
+      if event.elapsed >= last[0] + 1:
+        last[0] = event.elapsed
+        print('NM [%d -> %d] [%.3f -> %.3f] [%.1f -> %.1f]'%(event.evaluations, li, event.value, lv, event.elapsed, lt))
+      return callback is not None and callback(event)
+    return report
+
+  def run(self, simplex):
+    '''
+    iterates until either the target is found, the evaluation limit is reached, the time limit is exceeded, or the
+    callback asks to stop
+    '''
+    callback = self._callback if self._silent else self._printing(self._callback)
+    telemetry = Telemetry('neldermead', callback)
+    counters = self._counters = _local.counters = telemetry.counters
+    engine = self._get_engine(simplex)
+    # cached values are free, but a run that only revisits known locations still has to stop eventually
+    while (self._limit is None or (counters.evaluations < self._limit and counters.hits < self._limit)) and (self._timer is None or counters.elapsed < self._timer):
+      latest = engine.step(self, telemetry)
+      if telemetry.step(latest):
+        break
+      if self._target is not None and latest < self._target:
+        break
+    best = engine.finish()
+    telemetry.finish()
+    if not self._silent:
+      li = self._limit if self._limit is not None else 0
+      lv = self._target if self._target is not None else 0
+      lt = self._timer if self._timer is not None else 0
+      print('NM [%d -> %d] [%.3f -> %.3f] [%.1f -> %.1f]'%(counters.evaluations, li, best._value, lv, counters.elapsed, lt))
+      if self._cache is not None:
+        print('NM cache [%d hits] [%d misses] [%d stored]'%(counters.hits, counters.evaluations, len(self._cache)))
+    if self._cache is not None:
+      self._cache.save()
+    return best
+
+  def get_counters(self):
+    ''' returns the telemetry Counters of the latest run of this solver '''
+    return self._counters
+
+if __name__ == "__main__":
+  # example usage
+  def himmelblau(params):
+    (x, y) = params
+    return (x**2 + y - 11)**2 + (x + y**2 - 7)**2
+  solver = NelderMead(himmelblau, limit_iterations=100, limit_value=0.001, limit_time=1)
+  simplex = solver.get_simplex(2, (0, 0), 0.1)
+  best = solver.run(simplex)
+  print('best:', best)
+  print('num evaluations:', Point.get_num_evaluations())
+
+  # more compact example
+  print('best:', NelderMead.optimize(himmelblau, 2))
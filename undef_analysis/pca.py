@@ -0,0 +1,257 @@
+import random
+import numpy as np
+from ._arrays import BLOCK_ELEMENTS, as_floats
+
+class PCA:
+  '''
+  Principal component analysis!
+  https://en.wikipedia.org/wiki/Principal_component_analysis
+  http://sebastianraschka.com/Articles/2014_pca_step_by_step.html
+  '''
+
+  @staticmethod
+  def _pick_solver(n, d, dimensions):
+    ''' picks the cheapest solver for finding dimensions components of data with n points in d dimensions '''
+    if d <= min(n, 2000):
+      # the covariance matrix is small enough to decompose directly
+      return 'eigh'
+    if dimensions <= 0.1 * min(n, d):
+      # a few components of large data are found much faster by sketching, and the default seed keeps it repeatable
+      return 'randomized'
+    # otherwise the exact solver working on the smaller of the covariance matrix and the data
+    return 'eigh' if n >= d else 'svd'
+
+  @staticmethod
+  def _centered_blocks(data, mean):
+    ''' yields the data minus the mean a block of points at a time, so that the temporary memory stays bounded '''
+    mean = mean.astype(data.dtype)
+    size = max(1, BLOCK_ELEMENTS // max(1, data.shape[1]))
+    for start in range(0, len(data), size):
+      yield data[start:start + size] - mean
+
+  @staticmethod
+  def _randomized_svd(data, rank, rng, oversamples=10, iterations=4, mean=None):
+    '''
+    returns the leading singular values and right singular vectors of data (Halko, Martinsson, Tropp)
+    https://arxiv.org/abs/0909.4061
+    mean: optional mean to subtract from every row of data, implicitly, without a centered copy of the data
+    '''
+    size = min(rank + oversamples, min(data.shape))
+    mean = np.zeros(data.shape[1]) if mean is None else mean
+    # (data - 1 mean') x = data x - 1 (mean' x), and (data - 1 mean')' y = data' y - mean (1' y)
+    product = lambda x: data @ x.astype(data.dtype) - (mean @ x).astype(data.dtype)
+    transposed = lambda y: data.T @ y.astype(data.dtype) - np.outer(mean, y.sum(axis=0))
+    q = product(rng.standard_normal((data.shape[1], size)))
+    # power iterations sharpen the estimate when the spectrum decays slowly
+    for i in range(iterations):
+      q = np.linalg.qr(q)[0]
+      q = product(np.linalg.qr(transposed(q))[0])
+    q = np.linalg.qr(q)[0]
+    _, s, vt = np.linalg.svd(transposed(q).T, full_matrices=False)
+    return s[:rank], vt[:rank]
+
+  def __init__(self, data, dimensions, solver='auto', seed=None, dtype=None):
+    '''
+    finds the principal components and projects the data onto a subset of these components
+    data: an (n, d) array or a list of high dimensional points *assumed to be in Euclidean space*; arrays
+      (including read-only memory-mapped ones) are used without being copied (except by the 'svd' solver), and
+      the result is then an array too
+    dimensions: the dimensionality of the output
+    solver: how to find the principal components, one of
+      'eigh' - symmetric eigendecomposition of the covariance matrix
+      'svd' - thin singular value decomposition of the centered data, without forming the covariance matrix
+      'randomized' - randomized truncated singular value decomposition, finding only the first dimensions
+        components (so get_components returns only those), approximately
+      'eig' - general eigendecomposition of the covariance matrix
+      'auto' - picks one of the above from the shape of the data and dimensions (default): 'eigh' for up to 2000
+        dimensions, 'randomized' for few components of larger data, and otherwise 'eigh' or 'svd' (for d > n)
+    seed: optional seed for the randomized solver, which otherwise always uses the same one, so that results are
+      repeatable
+    dtype: optional type for the computation and the result, e.g. numpy.float32 to halve memory and time; by
+      default float32 data stays float32 and anything else is computed in float64 (covariances are always
+      accumulated in float64)
+    '''
+    if dimensions > len(data[0]):
+      raise Exception('output dimensions must be less than or equal to the number of input dimensions [%d > %d]'%(dimensions, len(data[0])))
+    self._arrays = isinstance(data, np.ndarray)
+    original = data
+    data = as_floats(data, dtype)
+    (n, d) = data.shape
+    self._mean = data.mean(axis=0, dtype=np.float64)
+    if solver == 'auto':
+      solver = PCA._pick_solver(n, d, dimensions)
+    if solver in ('eig', 'eigh'):
+      scatter = np.zeros((d, d))
+      for block in PCA._centered_blocks(data, self._mean):
+        # one block at a time is upcast, so the products are float64 too, not just the sum
+        block = block.astype(np.float64, copy=False)
+        scatter += block.T @ block
+      total = np.trace(scatter) / (n - 1)
+      if solver == 'eig':
+        vals, vecs = np.linalg.eig(scatter / (n - 1))
+        vals, vecs = np.abs(vals), vecs.transpose().real
+      else:
+        vals, vecs = np.linalg.eigh(scatter / (n - 1))
+        vals, vecs = np.abs(vals), vecs.transpose()
+    else:
+      total = sum(np.einsum('ij,ij->', block, block, dtype=np.float64) for block in PCA._centered_blocks(data, self._mean)) / (n - 1)
+      if solver == 'svd':
+        # the full decomposition needs the centered data as a whole
+        _, s, vecs = np.linalg.svd(data - self._mean.astype(data.dtype), full_matrices=False)
+      elif solver == 'randomized':
+        s, vecs = PCA._randomized_svd(data, dimensions, np.random.default_rng(0 if seed is None else seed), mean=self._mean)
+      else:
+        raise Exception('unknown solver [%s]'%(solver))
+      vals = s.astype(np.float64) ** 2 / (n - 1)
+    # the total variance is the trace of the covariance matrix, even when only some components were found
+    self._set_components(vals, vecs.astype(np.float64), total, dimensions)
+    # the result is projected on first use; a converted copy of a list isn't kept until then, only the list itself
+    self._data = data if self._arrays else original
+    self._dtype = data.dtype
+    self._result = None
+
+  def _set_components(self, vals, vecs, total, dimensions):
+    ''' sorts the components (rows of vecs) by variance and keeps the first dimensions for projection '''
+    order = np.argsort(-vals, kind='stable')
+    vals, vecs = vals[order], vecs[order]
+    # the sign of each component is arbitrary, so make its largest coordinate positive for consistency across solvers
+    signs = np.sign(vecs[np.arange(len(vecs)), np.argmax(np.abs(vecs), axis=1)])
+    vecs = vecs * np.where(signs == 0, 1, signs)[:, np.newaxis]
+    self._components = [(val / total, vec.tolist()) for (val, vec) in zip(vals.tolist(), vecs)]
+    self._w = vecs[:dimensions]
+
+  def project(self, vector):
+    ''' projects a point onto a subset of the principal components '''
+    return self._w.dot(vector - self._mean).tolist()
+
+  def project_many(self, data, dtype=None, out=None):
+    '''
+    projects many points onto a subset of the principal components, with one matrix product per block of points
+    data: an (n, d) array (or list) of points
+    dtype: optional type of the computation and the result, e.g. numpy.float32 to halve memory and time
+    out: optional (n, dimensions) array to write the result into (of type dtype when given)
+    returns an (n, dimensions) array
+    '''
+    data = np.asarray(data)
+    if dtype is None:
+      dtype = out.dtype if out is not None else np.result_type(data.dtype, np.float32)
+    if out is None:
+      out = np.empty((len(data), len(self._w)), dtype=dtype)
+    w = self._w.T.astype(dtype)
+    mean = self._mean.astype(dtype)
+    # centering a block at a time keeps the temporary memory bounded without losing precision to the mean
+    size = max(1, BLOCK_ELEMENTS // max(1, data.shape[1]))
+    for start in range(0, len(data), size):
+      block = data[start:start + size].astype(dtype)
+      block -= mean
+      np.matmul(block, w, out=out[start:start + size])
+    return out
+
+  def get_result(self):
+    '''
+    returns the data projected onto a subset of the principal components, as an array (in the type of the
+    computation) if the data was an array and otherwise a list
+    '''
+    if self._result is None:
+      result = self.project_many(self._data, self._dtype)
+      self._result = result if self._arrays else result.tolist()
+      self._data = None
+    return self._result
+
+  def get_components(self):
+    ''' returns the sorted list of all principal components '''
+    return self._components
+
+class IncrementalPCA(PCA):
+  '''
+  Principal component analysis in a single streaming pass, for data that is too large to hold in memory
+  the mean and scatter matrix are accumulated one chunk at a time, merging each chunk with the pairwise update
+  https://en.wikipedia.org/wiki/Algorithms_for_calculating_variance#Parallel_algorithm
+  '''
+
+  def __init__(self, dimensions):
+    '''
+    dimensions: the dimensionality of the output
+    '''
+    self._dimensions = dimensions
+    self._count = 0
+    self._mean = self._scatter = None
+    # the components are found on first use after the last update
+    self._w = self._components = None
+
+  def partial_fit(self, chunk):
+    ''' updates the mean and scatter matrix with a chunk of points '''
+    chunk = np.asarray(chunk, dtype=float)
+    m = len(chunk)
+    if m == 0:
+      return self
+    if self._dimensions > chunk.shape[1]:
+      raise Exception('output dimensions must be less than or equal to the number of input dimensions [%d > %d]'%(self._dimensions, chunk.shape[1]))
+    mean = chunk.mean(axis=0)
+    centered = chunk - mean
+    scatter = centered.T @ centered
+    if self._count == 0:
+      self._mean, self._scatter = mean, scatter
+    else:
+      # merging centered statistics avoids the cancellation of accumulating raw sums of squares
+      n = self._count
+      delta = mean - self._mean
+      self._scatter += scatter + np.outer(delta, delta) * (n * m / (n + m))
+      self._mean = self._mean + delta * (m / (n + m))
+    self._count += m
+    self._w = self._components = None
+    return self
+
+  def fit(self, source, batch_size=1024):
+    '''
+    accumulates all of the data
+    source: either an array (which may be memory-mapped, see numpy.load(mmap_mode='r')) that is read in
+      slices of batch_size rows, or an iterable of chunks
+    '''
+    if hasattr(source, 'shape'):
+      for start in range(0, len(source), batch_size):
+        self.partial_fit(source[start:start + batch_size])
+    else:
+      for chunk in source:
+        self.partial_fit(chunk)
+    return self
+
+  def _decompose(self):
+    ''' finds the principal components of the data seen so far '''
+    if self._count < 2:
+      raise Exception('at least two points are needed [%d]'%(self._count))
+    covariance = self._scatter / (self._count - 1)
+    vals, vecs = np.linalg.eigh(covariance)
+    self._set_components(np.abs(vals), vecs.transpose(), np.trace(covariance), self._dimensions)
+
+  def project(self, vector):
+    ''' projects a point onto a subset of the principal components '''
+    if self._w is None:
+      self._decompose()
+    return super().project(vector)
+
+  def project_many(self, data, dtype=None, out=None):
+    ''' see PCA.project_many '''
+    if self._w is None:
+      self._decompose()
+    return super().project_many(data, dtype, out)
+
+  def get_result(self):
+    ''' the data isn't kept, so points have to be projected with project '''
+    raise Exception('IncrementalPCA does not keep the data, use project')
+
+  def get_components(self):
+    ''' returns the sorted list of all principal components '''
+    if self._components is None:
+      self._decompose()
+    return self._components
+
+if __name__ == '__main__':
+  # example usage
+  input = [[i + random.gauss(0, 1), i + random.gauss(0, 1)] for i in range(5)]
+  pca = PCA(input, 1)
+  output = pca.get_result()
+  component = pca.get_components()[0]
+  print('The principle component is (%+.3f, %+.3f) and captures %d%% of the variance.'%(component[1][0], component[1][1], component[0] * 100))
+  for (i, o) in zip(input, output):
+    print('(%+.3f, %+.3f) -> (%+.3f)'%(i[0], i[1], o[0]))
@@ -0,0 +1,121 @@
+import time
+
+class Counters:
+  '''
+  totals for a single run, kept up to date while it runs and returned (or made available) with its result
+  objective_time is the time spent inside user supplied functions (objectives, distance functions, or external
+  solvers), and get_overhead is the rest
+  '''
+
+  def __init__(self):
+    # the number of completed iterations
+    self.iterations = 0
+    # the number of calls to the user supplied function
+    self.evaluations = 0
+    # the number of values taken from a cache instead of being computed
+    self.hits = 0
+    # the latest objective value, energy, stress or error, when known
+    self.value = None
+    # seconds since the run started, and how many of them were spent in user supplied functions
+    self.elapsed = 0.0
+    self.objective_time = 0.0
+    # whether a callback stopped the run early
+    self.stopped = False
+
+  def __repr__(self):
+    return 'Counters(iterations=%d, evaluations=%d, hits=%d, value=%s, elapsed=%.3f, objective_time=%.3f, stopped=%s)'%(
+      self.iterations, self.evaluations, self.hits, self.value, self.elapsed, self.objective_time, self.stopped)
+
+  def get_overhead(self):
+    ''' returns the time spent outside of user supplied functions '''
+    return max(self.elapsed - self.objective_time, 0.0)
+
+class Event:
+  '''
+  what a progress callback receives after each iteration
+  source names the algorithm (e.g. 'kmeans', 'neldermead', 'find_lambda', 'smacof'), and info holds anything
+  specific to it (e.g. the lambda and number of knots of a bisection step)
+  '''
+
+  def __init__(self, source, counters, info):
+    self.source = source
+    self.iteration = counters.iterations
+    self.evaluations = counters.evaluations
+    self.value = counters.value
+    self.elapsed = counters.elapsed
+    self.objective_time = counters.objective_time
+    self.info = info
+
+  def __repr__(self):
+    return 'Event(%s, iteration=%d, value=%s, elapsed=%.3f, objective_time=%.3f, info=%s)'%(
+      self.source, self.iteration, self.value, self.elapsed, self.objective_time, self.info)
+
+class Telemetry:
+  '''
+  the instrumentation of one run: keeps its Counters up to date, times user supplied functions, and passes an
+  Event to the optional callback after every iteration
+  a callback returning a true value stops the run after the current iteration
+  '''
+
+  def __init__(self, source, callback=None, counters=None):
+    # counters can be passed in to keep accumulating over several runs
+    self.counters = Counters() if counters is None else counters
+    self._source = source
+    self._callback = callback
+    self._start = time.perf_counter() - self.counters.elapsed
+
+  def timed(self, func):
+    ''' wraps a user supplied function so that its calls are counted and timed '''
+    def wrapper(*args):
+      start = time.perf_counter()
+      try:
+        return func(*args)
+      finally:
+        self.record(time.perf_counter() - start)
+    return wrapper
+
+  def record(self, seconds, evaluations=1):
+    ''' adds time spent (and calls made) in user supplied functions '''
+    self.counters.objective_time += seconds
+    self.counters.evaluations += evaluations
+
+  def step(self, value=None, **info):
+    ''' counts an iteration, reports it, and returns whether the callback asked to stop '''
+    counters = self.counters
+    counters.iterations += 1
+    if value is not None:
+      counters.value = value
+    counters.elapsed = time.perf_counter() - self._start
+    if self._callback is None or not self._callback(Event(self._source, counters, info)):
+      return False
+    counters.stopped = True
+    return True
+
+  def finish(self):
+    ''' stops the clock and returns the counters '''
+    self.counters.elapsed = time.perf_counter() - self._start
+    return self.counters
+
+def printer(interval=1.0):
+  ''' returns a callback that prints events, at most once per interval seconds '''
+  last = [None]
+  def callback(event):
+    if last[0] is None or event.elapsed >= last[0] + interval:
+      last[0] = event.elapsed
+      value = '%.6g'%(event.value) if event.value is not None else '-'
+      print('%s [%d] [%s] [%.1fs, %.1fs in objective]'%(event.source, event.iteration, value, event.elapsed, event.objective_time))
+  return callback
+
+if __name__ == '__main__':
+  # example usage
+  def slow_square(x):
+    time.sleep(0.01)
+    return x * x
+
+  # count and time every call to slow_square, and stop once the value is small enough
+  telemetry = Telemetry('example', callback=lambda event: event.value < 1e-3)
+  square = telemetry.timed(slow_square)
+  x = 1.0
+  while not telemetry.step(square(x), x=x):
+    x /= 2
+  print(telemetry.finish())
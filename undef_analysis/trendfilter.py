@@ -0,0 +1,393 @@
+# imports
+import functools
+import statistics
+import time
+import cvxopt as co
+import cvxopt.lapack
+import numpy as np
+from .telemetry import Counters, Telemetry
+
+# options for every cvxopt solve, passed per call so that other users of cvxopt aren't affected
+_SOLVER_OPTIONS = {'show_progress': False}
+
+# sparse first difference operator, (n - 1) x n
+def first_difference(n):
+  m = n - 1
+  return co.spmatrix([-1.0] * m + [+1.0] * m, list(range(m)) * 2, list(range(m)) + list(range(1, n)), (m, n))
+
+# sparse discrete difference operator, (n - kp1) x n with kp1 + 1 nonzeros per row
+def sparse_difference_operator(n, kp1, x=None):
+  k = kp1 - 1
+  if k < 0: raise Exception('k < 0')
+  if kp1 >= n: raise Exception('kp1 >= n')
+  if x is None:
+    x = [i for i in range(n)]
+  D = first_difference(n)
+  for j in range(1, kp1):
+    # each order differences the previous one, scaled by the spacing of the positions it spans
+    D = first_difference(n - j) * co.spdiag([j / (x[i + j] - x[i]) for i in range(n - j)]) * D
+  return D
+
+# discrete difference operator, as a dense list of rows
+def difference_operator(n, kp1, x=None):
+  M = co.matrix(sparse_difference_operator(n, kp1, x))
+  return [[M[row, col] for col in range(M.size[1])] for row in range(M.size[0])]
+
+# banded form of a difference operator: row i of D has its nonzeros D[i, i + j] at coefs[i, j]
+def difference_bands(D):
+  (m, n) = D.size
+  coefs = np.zeros((m, n - m + 1))
+  I, J, V = (np.array(a, dtype=float).ravel() for a in (D.I, D.J, D.V))
+  coefs[I.astype(int), (J - I).astype(int)] = V
+  return coefs
+
+# D * x, for D in banded form and x with one series per column
+def _apply(coefs, x):
+  m = coefs.shape[0]
+  return sum(coefs[:, j, np.newaxis] * x[j:j + m] for j in range(coefs.shape[1]))
+
+# D' * v, for D in banded form and v with one series per column
+def _apply_transpose(coefs, v):
+  (m, w) = coefs.shape
+  out = np.zeros((m + w - 1, v.shape[1]))
+  for j in range(w):
+    out[j:j + m] += coefs[:, j, np.newaxis] * v
+  return out
+
+# lower band storage of D * D', which has the same bandwidth as D
+def _gram_bands(coefs):
+  (m, w) = coefs.shape
+  # (D * D')[i + s, i] gathers coefs[i + s, j] * coefs[i, j + s] over the columns the two rows share
+  band = np.zeros((w, m))
+  for s in range(min(w, m)):
+    band[s, :m - s] = np.einsum('ij,ij->i', coefs[s:, :w - s], coefs[:m - s, s:])
+  return band
+
+# Cholesky factorization of a banded, positive definite matrix, given in lower band storage
+def _band_factor(band):
+  factor = co.matrix(np.asfortranarray(band))
+  co.lapack.pbtrf(factor, uplo='L')
+  return factor
+
+# solves the factored system for each column of x
+def _band_solve(factor, x):
+  b = co.matrix(x.ravel(order='F'))
+  co.lapack.pbtrs(factor, b, uplo='L')
+  return np.asarray(b).reshape(x.shape, order='F')
+
+# primal-dual interior point method on the dual problem, for each column of y, with all columns
+# solved together as one block banded system per Newton step
+# adapted from l1_tf: https://web.stanford.edu/~boyd/papers/l1_trend_filter.html
+# returns the fit and the final (z, mu1, mu2), which can be passed back as start to warm start a nearby problem
+def _solve_pdip(coefs, y, lambda_, start=None, tolerance=1e-8, limit_iterations=100):
+  (m, w) = coefs.shape
+  count = y.shape[1]
+  # barrier and line search parameters
+  MU, ALPHA, BETA, LIMIT_SEARCH = 2, 0.01, 0.5, 20
+  # the independent columns form one block diagonal system, whose blocks are banded
+  gram = np.tile(_gram_bands(coefs), count)
+  Dy = _apply(coefs, y)
+  if start is None:
+    z = np.zeros((m, count))
+    mu1, mu2 = np.ones((m, count)), np.ones((m, count))
+  else:
+    (z, mu1, mu2) = start
+  f1, f2 = z - lambda_, -z - lambda_
+  t = np.full(count, 1e-10)
+  step = np.full(count, np.inf)
+  for iteration in range(limit_iterations):
+    DTz = _apply_transpose(coefs, z)
+    DDTz = _apply(coefs, DTz)
+    v = Dy - (mu1 - mu2)
+    # the duality gap bounds the suboptimality of the fit y - D' * z (D * D' is too badly conditioned for
+    # the tighter bound of l1_tf at high orders)
+    pobj = 0.5 * np.sum(DTz ** 2, axis=0) + lambda_ * np.sum(np.abs(Dy - DDTz), axis=0)
+    dobj = -0.5 * np.sum(DTz ** 2, axis=0) + np.sum(Dy * z, axis=0)
+    gap = pobj - dobj
+    # converged columns stop moving, so that each column ends up exactly as if it were solved alone
+    active = gap > tolerance * np.maximum(1, np.abs(dobj))
+    if not np.any(active):
+      break
+    t = np.where(active & (step >= 0.2), np.maximum(2 * m * MU / gap, 1.2 * t), t)
+    # newton step, through a banded Cholesky factorization
+    newton = gram.copy()
+    newton[0] -= (mu1 / f1 + mu2 / f2).ravel(order='F')
+    dz = _band_solve(_band_factor(newton), Dy - DDTz + (1 / t) / f1 - (1 / t) / f2)
+    dmu1 = -(mu1 + ((1 / t) + dz * mu1) / f1)
+    dmu2 = -(mu2 + ((1 / t) - dz * mu2) / f2)
+    residual = np.sqrt(np.sum((DDTz - v) ** 2, axis=0) + np.sum((mu1 * f1 + 1 / t) ** 2, axis=0) + np.sum((mu2 * f2 + 1 / t) ** 2, axis=0))
+    # backtracking line search, keeping the multipliers positive and the dual variables strictly feasible
+    step = np.ones(count)
+    for (mu, dmu) in ((mu1, dmu1), (mu2, dmu2)):
+      ratio = np.where(dmu < 0, -mu / np.where(dmu < 0, dmu, -1), np.inf)
+      step = np.minimum(step, 0.99 * ratio.min(axis=0))
+    step = np.where(active, step, 0)
+    for search in range(LIMIT_SEARCH):
+      new_z, new_mu1, new_mu2 = z + step * dz, mu1 + step * dmu1, mu2 + step * dmu2
+      new_f1, new_f2 = new_z - lambda_, -new_z - lambda_
+      new_residual = np.sqrt(
+        np.sum((_apply(coefs, _apply_transpose(coefs, new_z)) - Dy + new_mu1 - new_mu2) ** 2, axis=0) +
+        np.sum((new_mu1 * new_f1 + 1 / t) ** 2, axis=0) +
+        np.sum((new_mu2 * new_f2 + 1 / t) ** 2, axis=0))
+      accepted = (np.maximum(new_f1.max(axis=0), new_f2.max(axis=0)) < 0) & (new_residual <= (1 - ALPHA * step) * residual)
+      if np.all(accepted):
+        break
+      step = np.where(accepted, step, BETA * step)
+    z, mu1, mu2, f1, f2 = new_z, new_mu1, new_mu2, new_f1, new_f2
+  return y - _apply_transpose(coefs, z), (z, mu1, mu2)
+
+# the difference operator of a grid and its bands, shared by every solve on that grid
+# positions must be hashable (a tuple) or None
+@functools.lru_cache(maxsize=32)
+def _operators(n, order, positions):
+  D = sparse_difference_operator(n, order + 1, positions)
+  return D, difference_bands(D)
+
+# the quadratic and the box constraints of the dual QP, only needed by the 'cvxopt' solver
+# G is built from triplets; assigning slices of an spmatrix costs O(m^2)
+@functools.lru_cache(maxsize=32)
+def _qp_operators(n, order, positions):
+  m = n - order - 1
+  D = _operators(n, order, positions)[0]
+  G = co.spmatrix([+1.0] * m + [-1.0] * m, range(2*m), list(range(m)) * 2, (2*m, m))
+  return D * D.T, G
+
+# trend filter implementation
+# solver is either 'cvxopt' (generic QP on the dual problem) or 'pdip' (specialized primal-dual interior point
+# method, with O(n * order^2) work per iteration)
+# every solve starts cold: warm starting from a nearby lambda can leave the solver on that lambda's set of knots, so
+# the knot count (and the path built on it) would depend on which lambdas were solved before
+def trend_filter(values, lambda_, order, positions=None, solver='cvxopt'):
+  corr = co.matrix(values)
+  n = len(values)
+  m = n - order - 1
+  key = None if positions is None else tuple(positions)
+  D, coefs = _operators(n, order, key)
+  if solver == 'cvxopt':
+    P, G = _qp_operators(n, order, key)
+    q = -D * corr
+    h = co.matrix(float(lambda_), (2*m, 1))
+    res = co.solvers.qp(P, q, G, h, options=_SOLVER_OPTIONS)
+    points = corr - D.T * res['x']
+  elif solver == 'pdip':
+    if lambda_ == 0:
+      points = corr
+    else:
+      points = co.matrix(_solve_pdip(coefs, np.array(corr), float(lambda_))[0])
+  else:
+    raise Exception('unknown solver [%s]'%(solver))
+  knots = [(i, x) for (i, x) in enumerate([y for y in D * points]) if abs(x) >= 1e-3]
+  fit = [x for x in points]
+  error = sum([(a - b) ** 2 for (a, b) in zip(values, fit)]) ** 0.5
+  return fit, error, knots
+
+# trend filter many series (the rows of matrix) sharing one grid, with the same lambda and order
+# the operator is built once, and with the 'pdip' solver all series are solved together, one block banded
+# factorization per Newton step; processes optionally splits the series over a pool of worker processes
+# returns an array of fits (one per row), an array of errors, and a list of knots for each series
+def trend_filter_many(matrix, lambda_, order, positions=None, solver='pdip', processes=None):
+  values = np.asarray(matrix, dtype=float)
+  if processes is not None and processes > 1 and len(values) > 1:
+    from multiprocessing import Pool
+    chunks = np.array_split(values, min(processes, len(values)))
+    with Pool(processes) as pool:
+      results = pool.starmap(trend_filter_many, [(c, lambda_, order, positions, solver) for c in chunks])
+    return np.concatenate([r[0] for r in results]), np.concatenate([r[1] for r in results]), sum([r[2] for r in results], [])
+  (count, n) = values.shape
+  D, coefs = _operators(n, order, None if positions is None else tuple(positions))
+  if lambda_ == 0:
+    fits = values.copy()
+  elif solver == 'pdip':
+    fits = _solve_pdip(coefs, values.T, float(lambda_))[0].T
+  elif solver == 'cvxopt':
+    fits = np.array([trend_filter(v, lambda_, order, positions, solver)[0] for v in values.tolist()])
+  else:
+    raise Exception('unknown solver [%s]'%(solver))
+  errors = np.sqrt(np.sum((values - fits) ** 2, axis=1))
+  jumps = _apply(coefs, fits.T).T
+  knots = [[(i, x) for (i, x) in enumerate(row) if abs(x) >= 1e-3] for row in jumps.tolist()]
+  return fits, errors, knots
+
+# remembers every trend filter solved for one series, so bisections revisiting a lambda don't solve it again
+# counters collects the telemetry of every search using the cache, with solver time counted as objective time
+class TrendFilterCache:
+
+  def __init__(self, values, order, positions=None, solver='cvxopt'):
+    self.values, self.order, self.positions, self.solver = values, order, positions, solver
+    self.solves = {}
+    self.hits = self.misses = 0
+    self.counters = Counters()
+
+  def trend_filter(self, lambda_):
+    if lambda_ in self.solves:
+      self.hits += 1
+      self.counters.hits += 1
+    else:
+      self.misses += 1
+      timer = time.perf_counter()
+      self.solves[lambda_] = trend_filter(self.values, lambda_, self.order, self.positions, self.solver)
+      self.counters.objective_time += time.perf_counter() - timer
+      self.counters.evaluations += 1
+    return self.solves[lambda_]
+
+# find trend filter lambda minimizing fitting error for some number of knots
+# callback optionally receives a telemetry event (with the error, lambda and knots) after every bisection step, and
+# stops the search by returning a true value; the counters accumulate in cache.counters
+def find_lambda(values, order, num_knots, lambda_max, threshold=1e-3, solver='cvxopt', cache=None, callback=None):
+  if cache is None:
+    cache = TrendFilterCache(values, order, solver=solver)
+  telemetry = Telemetry('find_lambda', callback, cache.counters)
+  best = _find_lambda(num_knots, lambda_max, threshold, cache, telemetry)
+  telemetry.finish()
+  return best
+
+# the bisection of find_lambda, reporting to a telemetry that may span several searches
+def _find_lambda(num_knots, lambda_max, threshold, cache, telemetry):
+  if num_knots == len(cache.values) - cache.order - 1:
+    fit, error, knots = cache.trend_filter(0)
+    return fit, error, knots, 0
+  lambda_min = 0
+  best = None
+  count = 0
+  while count < 100 and (best is None or lambda_max - lambda_min > threshold):
+    lambda_ = (lambda_min + lambda_max) / 2
+    fit, error, knots = cache.trend_filter(lambda_)
+    if len(knots) > num_knots:
+      lambda_min = lambda_
+    else:
+      lambda_max = lambda_
+      if len(knots) == num_knots:
+        best = (fit, error, knots, lambda_max)
+    count += 1
+    if telemetry.step(error, lambda_=lambda_, knots=len(knots), num_knots=num_knots):
+      break
+  return best
+
+# trend filter path
+# all solves share one cache, so bisections revisiting a lambda are free
+# callback is passed along to find_lambda, and stopping it ends the path early; pass a cache to read its counters
+def trend_filter_path(values, order, solver='cvxopt', callback=None, cache=None):
+  return list(_trend_filter_path(values, order, solver, callback, cache))[::-1]
+
+# yields the trend filter path one entry at a time, from min_knots up (decreasing lambda)
+def _trend_filter_path(values, order, solver='cvxopt', callback=None, cache=None):
+  if cache is None:
+    cache = TrendFilterCache(values, order, solver=solver)
+  telemetry = Telemetry('find_lambda', callback, cache.counters)
+  try:
+    min_knots = 0
+    max_knots = len(values) - order - 1
+    # find a high enough value of lambda such that min_knots is reached
+    lambda_max = 1
+    fit, error, knots = cache.trend_filter(lambda_max)
+    while len(knots) > min_knots:
+      lambda_max *= 2
+      fit, error, knots = cache.trend_filter(lambda_max)
+    # fill the the path from min_knots to max_knots (decreasing lambda)
+    for num_knots in range(min_knots, max_knots + 1):
+      result = _find_lambda(num_knots, lambda_max, 1e-3, cache, telemetry)
+      if telemetry.counters.stopped:
+        break
+      if result is not None:
+        lambda_max = result[-1]
+        yield result
+      else:
+        break
+  finally:
+    telemetry.finish()
+
+# splits off every k-th interior point (offset by fold) for validation, returning the values and positions kept
+def _fold(values, k, fold):
+  val, pos = [], []
+  for (i, v) in enumerate(values):
+    if i == 0 or i == len(values) - 1 or (i - 1 + fold) % k != 0:
+      val.append(v)
+      pos.append(i)
+  return val, pos
+
+# validation error of one fold for one lambda, and the seconds spent solving it
+def _fold_error(values, order, k, fold, lambda_, solver):
+  val, pos = _fold(values, k, fold)
+  timer = time.perf_counter()
+  fit, error, knots = trend_filter(val, lambda_, order, positions=pos, solver=solver)
+  seconds = time.perf_counter() - timer
+  test = []
+  vals = []
+  i, j = 0, 0
+  while i < len(values):
+    if pos[j] == i:
+      j += 1
+    else:
+      vals.append(values[i])
+      test.append((fit[j - 1] + fit[j]) / 2)
+    i += 1
+  return sum([(a - b) ** 2 for (a, b) in zip(vals, test)]) ** 0.5, seconds
+
+# cross-validated selection of trend filtering path
+# processes optionally spreads the fold solves over a pool of worker processes, starting them while the path is
+# still being found; the fold operators are built once per process and reused across the path
+# when the callback stops the path search early, the curve only covers the lambdas found so far, and if it stopped
+# before the first one the curve is empty and both selected trend filters are None
+# the fold solves (in workers too) are counted and timed along with the path's, in cache.counters; pass a cache to
+# read them (with processes, objective_time adds up the workers' time, so it can exceed elapsed)
+def cross_validated_trend_filter(values, order, k=5, solver='cvxopt', processes=None, callback=None, cache=None):
+  if cache is None:
+    cache = TrendFilterCache(values, order, solver=solver)
+  telemetry = Telemetry('cross_validation', None, cache.counters)
+  pool = None
+  if processes is not None and processes > 1:
+    # multiprocessing is only imported by the features that use it, to keep imports fast
+    from multiprocessing import Pool
+    pool = Pool(processes)
+  try:
+    jobs = []
+    for tf in _trend_filter_path(values, order, solver, callback, cache):
+      args = [(values, order, k, fold, tf[3], solver) for fold in range(k)]
+      if pool is None:
+        results = [_fold_error(*a) for a in args]
+        for (e, seconds) in results:
+          telemetry.record(seconds)
+        jobs.append((tf, results))
+      else:
+        jobs.append((tf, [pool.apply_async(_fold_error, a) for a in args]))
+    error_curve = []
+    for (tf, results) in jobs[::-1]:
+      fit, error, knots, lambda_ = tf
+      if pool is not None:
+        results = [r.get() for r in results]
+        for (e, seconds) in results:
+          telemetry.record(seconds)
+      errors = [e for (e, seconds) in results]
+      error_avg, error_se = statistics.mean(errors), statistics.pstdev(errors) / (k ** 0.5)
+      error_curve.append({'tf': tf, 'num_knots': len(knots), 'lambda': lambda_, 'error': error_avg, 'se': error_se})
+  finally:
+    if pool is not None:
+      pool.close()
+      pool.join()
+    telemetry.finish()
+  if len(error_curve) == 0:
+    return error_curve, None, None
+  error_min = None
+  for e in error_curve:
+    if error_min is None or e['error'] < error_min['error']:
+      error_min = e
+  error_1se = None
+  for e in error_curve:
+    if e['error'] < error_min['error'] + error_min['se']:
+      error_1se = e
+  return error_curve, error_min['tf'], error_1se['tf']
+
+if __name__ == '__main__':
+  # example usage
+  import random
+  values = [abs(i - 20) + random.gauss(0, 1) for i in range(40)]
+  cache = TrendFilterCache(values, 1)
+  curve, best, best_1se = cross_validated_trend_filter(values, 1, cache=cache)
+  print('Path: %d fits'%(len(curve)))
+  print('Counters: %s'%(cache.counters))
+  print('Best: %d knots, error %.3f'%(len(best[2]), best[1]))
+  print('Within 1 SE: %d knots, error %.3f'%(len(best_1se[2]), best_1se[1]))
+  # a callback can stop the path search, even before anything is found
+  curve, best, best_1se = cross_validated_trend_filter(values, 1, callback=lambda event: True)
+  assert len(curve) == 0 and best is None and best_1se is None
+  print('Stopped early: %d fits'%(len(curve)))